@@ -3,9 +3,11 @@ Delivery agent for the Instagram Recipe Agent.
 Handles email delivery of recipe PDFs to users.
 """
 
+import atexit
 import logging
 import os
 import smtplib
+import threading
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
@@ -16,6 +18,10 @@ logger = logging.getLogger(__name__)
 class DeliveryAgent:
     """Handles the delivery of recipe PDFs to users via email."""
     
+    # Socket timeout for SMTP connect and commands, so a hung server cannot
+    # block every sender queued behind the connection lock
+    SMTP_TIMEOUT_SECONDS = 30
+    
     def __init__(
         self, 
         smtp_server: str, 
@@ -39,6 +45,11 @@ class DeliveryAgent:
         self.smtp_password = smtp_password
         self.sender_email = sender_email
         
+        # One authenticated connection, reused across sends
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_lock = threading.Lock()
+        atexit.register(self.close)
+        
     def send_recipe_email(self, recipient_email: str, recipe_title: str, pdf_path: str) -> bool:
         """Send a recipe PDF to a user via email.
         
@@ -84,10 +95,7 @@ The Fetch Bites Team
                 message.attach(attachment)
             
             # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(message)
+            self._send_message(message)
             
             logger.info(f"Recipe email sent to {recipient_email}: {recipe_title}")
             return True
@@ -133,10 +141,7 @@ The Fetch Bites Team
             message.attach(MIMEText(body, "plain"))
             
             # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(message)
+            self._send_message(message)
             
             logger.info(f"Welcome email sent to {recipient_email}")
             return True
@@ -144,3 +149,75 @@ The Fetch Bites Team
         except Exception as e:
             logger.error(f"Error sending welcome email: {str(e)}")
             return False
+    
+    def close(self):
+        """Close the persistent SMTP connection, if one is open."""
+        with self._smtp_lock:
+            server, self._smtp = self._smtp, None
+        self._quit(server)
+    
+    def _connect(self) -> smtplib.SMTP:
+        """Open and authenticate a new SMTP connection, closing it if setup fails."""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.SMTP_TIMEOUT_SECONDS)
+        try:
+            server.starttls()
+            server.login(self.smtp_username, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    @staticmethod
+    def _quit(server: Optional[smtplib.SMTP]):
+        """Close a connection, ignoring errors from a dead socket."""
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+    
+    def _send_message(self, message: MIMEMultipart):
+        """Send a message over the persistent connection.
+        
+        The TLS handshake and login happen once and are reused for later
+        sends. The connection is checked out for the send, so the lock only
+        guards the hand-off; a sender that finds it in use opens its own.
+        If the server has dropped the idle connection, it is reopened and
+        the send retried once.
+        
+        Args:
+            message: Fully built email message
+        """
+        for attempt in range(2):
+            with self._smtp_lock:
+                server, self._smtp = self._smtp, None
+            if server is None:
+                server = self._connect()
+            
+            try:
+                server.send_message(message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self._quit(server)
+                if attempt:
+                    raise
+                logger.info("SMTP connection dropped, reconnecting")
+                continue
+            except smtplib.SMTPException:
+                # Rejected by the server; the connection itself is still good
+                self._release(server)
+                raise
+            except Exception:
+                # Timeouts and the like leave the session in an unknown state
+                self._quit(server)
+                raise
+            
+            self._release(server)
+            return
+    
+    def _release(self, server: smtplib.SMTP):
+        """Return a checked-out connection, closing it if another took its place."""
+        with self._smtp_lock:
+            if self._smtp is None:
+                self._smtp = server
+                return
+        self._quit(server)
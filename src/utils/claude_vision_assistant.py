@@ -1,10 +1,37 @@
 import os
+import io
+import random
+import asyncio
+import atexit
 import base64
+import functools
+import hashlib
 import json
 import logging
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Union, Tuple
-from anthropic import Anthropic
+import httpx
+from anthropic import Anthropic, AsyncAnthropic, APIStatusError, DefaultHttpxClient, RateLimitError
+from PIL import Image
+import pytesseract
+
+try:
+    # SIMD-accelerated (AVX2/AVX-512/NEON) base64; returns str without a separate decode
+    from pybase64 import b64encode_as_string
+except ImportError:
+    def b64encode_as_string(data: bytes) -> str:
+        # Base64 output is pure ASCII, so the cheaper ascii codec is sufficient
+        return base64.b64encode(data).decode("ascii")
+
+try:
+    # Native JSON parser; orjson.JSONDecodeError subclasses json.JSONDecodeError
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 # Set up logging
 logging.basicConfig(
@@ -15,6 +42,460 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Patterns used to pull structured data out of Claude responses and DM text
+_JSON_FENCE_RE = re.compile(r'```json\n(.*?)\n```', re.DOTALL)
+_COORD_TUPLE_RE = re.compile(r'\((\d*\.\d+),\s*(\d*\.\d+)\)')
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,24}\b')
+_IG_URL_RE = re.compile(r"https://www\.instagram\.com/[^\s\"']+")
+_BLOG_URL_RE = re.compile(r"https?://(?:www\.)?[\w.-]+\.[a-z]{2,}(?:/[^\s\"']+)?")
+
+
+def _search_instagram_url(text: str) -> Optional[re.Match]:
+    """Find the first Instagram URL in text, skipping the regex when none can be present."""
+    if "instagram.com/" not in text:
+        return None
+    return _IG_URL_RE.search(text)
+
+
+def _find_emails(text: str) -> List[str]:
+    """Find email addresses in text, skipping the regex when there is no '@'."""
+    if "@" not in text:
+        return []
+    return _EMAIL_RE.findall(text)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_client(api_key: str) -> Anthropic:
+    """
+    Return the process-wide Anthropic client for an API key.
+
+    The client keeps TCP/TLS connections alive between calls, so repeated
+    screenshot analyses skip the handshake. It is closed at interpreter exit.
+    SDK retries are disabled; ClaudeVisionAssistant._call_with_retry is the
+    only retry policy.
+    """
+    client = Anthropic(
+        api_key=api_key,
+        max_retries=0,
+        http_client=DefaultHttpxClient(
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=120)
+        )
+    )
+    atexit.register(client.close)
+    return client
+
+
+# Process-wide background event loop that drives async calls for synchronous
+# callers, and the AsyncAnthropic clients bound to it (one per API key)
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_clients: Dict[str, AsyncAnthropic] = {}
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background event loop, starting its thread on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="claude-vision-loop", daemon=True).start()
+        return _loop
+
+
+def _get_async_client(api_key: str) -> AsyncAnthropic:
+    """
+    Return the process-wide AsyncAnthropic client for an API key.
+
+    Its connection pool binds to the first event loop that uses it, so it must
+    only be awaited on the background loop; see _on_background_loop.
+    """
+    with _loop_lock:
+        client = _async_clients.get(api_key)
+        if client is None:
+            client = _async_clients[api_key] = AsyncAnthropic(api_key=api_key, max_retries=0)
+        return client
+
+
+async def _on_background_loop(coro):
+    """Await a coroutine on the background loop from whatever loop the caller runs."""
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, _get_loop()))
+
+
+def _shutdown_async():
+    """Close the async clients on the background loop, then stop the loop."""
+    with _loop_lock:
+        loop, clients = _loop, list(_async_clients.values())
+    if loop is None:
+        return
+    for client in clients:
+        try:
+            asyncio.run_coroutine_threadsafe(client.close(), loop).result(timeout=5)
+        except Exception as e:
+            logger.debug(f"Error closing async Claude client: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+
+
+atexit.register(_shutdown_async)
+
+
+# Prompts for the JSON-returning screenshot analyses
+_UI_ELEMENTS_PROMPT = """
+Analyze this Instagram direct message interface screenshot.
+
+Identify the following UI elements with their normalized coordinates (0-1 range where 0,0 is top left and 1,1 is bottom right):
+1. Message input field (where users type messages)
+2. Send button
+3. Any visible user names or conversation entries
+4. Back button (if visible)
+5. Any visible message bubbles
+
+For each element, provide:
+- The element type (e.g., input_field, send_button, etc.)
+- The x, y coordinates of its center as normalized values between 0 and 1
+- Any visible text associated with the element
+
+Return the results as a JSON object with this structure:
+{
+    "input_field": {"x": 0.5, "y": 0.9, "text": ""},
+    "send_button": {"x": 0.9, "y": 0.9, "text": ""},
+    "conversations": [
+        {"x": 0.2, "y": 0.3, "text": "User1"},
+        {"x": 0.2, "y": 0.4, "text": "User2"}
+    ],
+    "back_button": {"x": 0.1, "y": 0.1, "text": "Back"},
+    "messages": [
+        {"x": 0.7, "y": 0.5, "text": "Hello", "from_user": false},
+        {"x": 0.3, "y": 0.6, "text": "Hi there", "from_user": true}
+    ]
+}
+"""
+
+_MESSAGES_PROMPT = """
+Analyze this Instagram direct message conversation screenshot.
+
+Extract all visible messages from the conversation, identifying:
+1. The message content
+2. Who sent each message (the user or the other person)
+3. Any timestamps or status indicators
+
+Return the results as a JSON array with this structure:
+[
+    {
+        "sender": "User" or the actual name if visible,
+        "content": "The text content of the message",
+        "timestamp": "Any visible timestamp" (optional),
+        "is_user_message": true/false (whether the message was sent by the user)
+    },
+    ...
+]
+
+Only include messages where you can clearly read the content.
+Order the messages from oldest to newest (top to bottom in the conversation).
+"""
+
+_EMAILS_PROMPT = """
+Examine this screenshot and extract any email addresses visible in the image.
+
+Focus specifically on:
+1. Messages that contain email addresses
+2. Any form fields that have email addresses entered
+3. Email addresses in any visible text
+
+Return only the email addresses as a JSON array of strings.
+For example: ["user@example.com", "another@gmail.com"]
+
+If no email addresses are visible, return an empty array: []
+"""
+
+_CLICKABLE_ELEMENTS_PROMPT = """
+Analyze this Instagram interface screenshot and identify all clickable elements.
+
+For each clickable element, determine:
+1. The element type (button, link, input, etc.)
+2. The approximate center coordinates in normalized form (0-1 range)
+3. The purpose or action associated with the element
+4. Any visible text or icon description
+
+Focus on identifying these types of elements:
+- Buttons (send, back, like, etc.)
+- Input fields
+- Navigation items
+- Conversation entries
+- Message bubbles that might be clickable
+- Menu items
+
+Return the results as a JSON object with categories of elements:
+{
+    "buttons": [
+        {"x": 0.9, "y": 0.1, "purpose": "Back", "text": "←"},
+        {"x": 0.95, "y": 0.9, "purpose": "Send", "text": "➤"}
+    ],
+    "inputs": [
+        {"x": 0.5, "y": 0.9, "purpose": "Message input", "text": "Message..."}
+    ],
+    "navigation": [
+        {"x": 0.1, "y": 0.2, "purpose": "Home", "text": "Home"}
+    ],
+    "conversations": [
+        {"x": 0.3, "y": 0.3, "purpose": "Open conversation", "text": "John Doe"}
+    ]
+}
+"""
+
+_CONVERSATION_LIST_PROMPT = """
+Analyze this Instagram Direct Messages inbox screenshot.
+
+Identify all visible conversations in the left sidebar or main view.
+For each conversation entry, provide:
+1. The name of the user or group
+2. The position (normalized x,y coordinates of the center)
+3. Any visible message preview or status
+4. Whether the conversation appears to have unread messages
+
+Return the results as a JSON array:
+[
+    {
+        "name": "User Name",
+        "x": 0.2,
+        "y": 0.3,
+        "preview": "Last message preview if visible",
+        "unread": true/false,
+        "active_status": "Active status if visible"
+    },
+    ...
+]
+
+Order the conversations from top to bottom as they appear in the interface.
+"""
+
+_INSTAGRAM_CONTENT_SYSTEM = "You are an expert UI interpreter for Instagram screenshots."
+
+_INSTAGRAM_CONTENT_PROMPT = """
+This is a screenshot of an Instagram DM thread. A user may have shared a post preview (e.g. video or photo thumbnail) and the DM interface may be visible.
+
+Please analyze the screenshot and return the following in **valid JSON**:
+
+- "is_shared_post": true or false — whether a shared post is present
+- "post_url": the Instagram post URL if visible
+- "confidence": a float between 0 and 1 for your certainty
+- "summary": a 1-line summary of what the post appears to be about
+- If visible, return the click target coordinates of the shared post preview as "click_target": {"x": ..., "y": ...}
+- If the message input field is visible, return "message_box": {"x": ..., "y": ...}
+- If the send button is visible, return "send_button": {"x": ..., "y": ...}
+
+Use normalized screen coordinates (0-1 range). Do not include any explanation — just return a single JSON object.
+Only return compact JSON, no whitespace.
+"""
+
+# Prompts for the coordinate, post-content and DM-thread helpers
+_SHARED_POST_COORDS_PROMPT = """
+You are an expert UI assistant. The attached screenshot is from an Instagram DM thread.
+
+A user has shared a post preview (e.g. a video thumbnail or image preview).
+Please locate the preview of that shared post.
+
+Respond in JSON:
+{
+    "x": 0.5,  // normalized X coordinate (0 to 1)
+    "y": 0.6   // normalized Y coordinate (0 to 1)
+}
+
+Only respond with the JSON. Do not include any explanation.
+"""
+
+_POST_CONTENT_PROMPT = """
+This is a screenshot of an Instagram post.
+
+Please extract the following in JSON format:
+{
+"caption": "...",
+"hashtags": ["...", "..."],
+"mentions": ["..."],
+"urls": ["..."]
+}
+
+Only include fields if present. Return clean JSON only.
+"""
+
+_CLICK_TARGET_PROMPT = """
+You are an expert UI assistant. This is a screenshot of the Instagram DM interface.
+
+Please locate the conversation tile that includes the name "{target_name}" on the left-hand sidebar.
+
+Return a JSON object like:
+{{
+    "click_target": {{ "x": float, "y": float }},
+    "reasoning": "one short sentence on why you chose this location"
+}}
+
+Only return JSON. No extra commentary.
+"""
+
+_UNREAD_THREADS_PROMPT = (
+    "You are viewing the Instagram DM interface. Your task is to locate all unread DM threads in the left panel. "
+    "These are visually identified by a small blue dot on the right edge of the conversation tile.\n\n"
+    "Please return a list of click coordinates `(x, y)` — one per unread thread — to click the center of the profile picture "
+    "or tile to open each thread. The coordinates should be normalized between 0 and 1, and listed from bottom to top, "
+    "in reverse vertical order.\n\n"
+    "Only include threads with a blue dot. Do not include any read threads."
+)
+
+_DM_HANDLE_PROMPT = (
+    "You're looking at an Instagram DM conversation. "
+    "What is the visible username or account handle of the other person in this chat? "
+    "Return only the handle as a plain string, like @chefjohn."
+)
+
+_DM_THREAD_PROMPT = """
+You are analyzing a screenshot of the Instagram inbox (DM list view).
+
+Your task is to:
+1. Identify any unread conversation threads. These are visually marked by a small **blue dot on the right side** of the thread row.
+2. If multiple unread threads are present, return the **lowest one on the list** (bottom-most unread thread).
+3. Return the normalized coordinates for clicking — not on the blue dot, but on the **center of the unread conversation tile**, typically where the profile image or name is. Do NOT click the blue dot itself.
+
+You should also return:
+- "handle": the username or name next to the blue dot
+- "is_shared_post": false (in this inbox view it's not visible)
+- "message_box" and "send_button": null
+- "post_url" and "caption": null
+- "confidence": float between 0 and 1 indicating how sure you are that it's an unread thread
+
+Return only JSON — no explanation or extra text.
+"""
+
+
+# JSON schemas for the structured (tool-use) results of each screenshot analysis
+_POINT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "x": {"type": "number"},
+        "y": {"type": "number"},
+        "text": {"type": "string"},
+    },
+    "required": ["x", "y"],
+}
+
+_CLICKABLE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "x": {"type": "number"},
+        "y": {"type": "number"},
+        "purpose": {"type": "string"},
+        "text": {"type": "string"},
+    },
+    "required": ["x", "y"],
+}
+
+_UI_ELEMENTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "input_field": _POINT_SCHEMA,
+        "send_button": _POINT_SCHEMA,
+        "back_button": _POINT_SCHEMA,
+        "conversations": {"type": "array", "items": _POINT_SCHEMA},
+        "messages": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {**_POINT_SCHEMA["properties"], "from_user": {"type": "boolean"}},
+                "required": ["x", "y"],
+            },
+        },
+    },
+}
+
+_CLICKABLE_ELEMENTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        category: {"type": "array", "items": _CLICKABLE_SCHEMA}
+        for category in ("buttons", "inputs", "navigation", "conversations")
+    },
+    "additionalProperties": {"type": "array", "items": _CLICKABLE_SCHEMA},
+}
+
+_MESSAGES_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "sender": {"type": "string"},
+            "content": {"type": "string"},
+            "timestamp": {"type": "string"},
+            "is_user_message": {"type": "boolean"},
+        },
+        "required": ["sender", "content"],
+    },
+}
+
+_CONVERSATION_LIST_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "x": {"type": "number"},
+            "y": {"type": "number"},
+            "preview": {"type": "string"},
+            "unread": {"type": "boolean"},
+            "active_status": {"type": "string"},
+        },
+        "required": ["name", "x", "y"],
+    },
+}
+
+# Analyses analyze_screenshot can bundle: task -> (prompt, result schema)
+_SCREENSHOT_TASKS = {
+    "ui": (_UI_ELEMENTS_PROMPT, _UI_ELEMENTS_SCHEMA),
+    "clickable": (_CLICKABLE_ELEMENTS_PROMPT, _CLICKABLE_ELEMENTS_SCHEMA),
+    "messages": (_MESSAGES_PROMPT, _MESSAGES_SCHEMA),
+    "conversations": (_CONVERSATION_LIST_PROMPT, _CONVERSATION_LIST_SCHEMA),
+}
+
+_SCREENSHOT_TOOL_NAME = "emit_screenshot_analysis"
+
+_COMBINED_TASKS_PROMPT = """
+Perform each of the analyses below on this screenshot.
+
+Record the result of each analysis under its section name ({keys}) in a single
+call to the emit_screenshot_analysis tool.
+"""
+
+
+def _extract_first_json(text: str, open_c: str = "{", close_c: str = "}") -> Optional[str]:
+    """
+    Return the first balanced JSON object (or array) in text, or None.
+
+    Scans the text once, tracking nesting depth and string literals so that
+    brackets inside values or in surrounding prose do not throw off the match.
+    """
+    start = text.find(open_c)
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == open_c:
+            depth += 1
+        elif ch == close_c:
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
 class ClaudeVisionAssistant:
     """
     Helper class to analyze Instagram UI using Claude Vision API.
@@ -22,6 +503,44 @@ class ClaudeVisionAssistant:
     """
 
     DEFAULT_MODEL = "claude-3-opus-20240229"
+    # Cheaper, faster model for coarse UI localization that only returns coordinates
+    COARSE_MODEL = "claude-3-haiku-20240307"
+
+    # Mid-tier model for the shared-post check, which only emits a short JSON object
+    POST_ANALYSIS_MODEL = "claude-3-5-sonnet-latest"
+
+    # Screenshots are downscaled to these bounds and re-encoded as JPEG before upload
+    IMAGE_MAX_SIDE = 1024
+    POST_IMAGE_MAX_SIDE = 768
+    COARSE_IMAGE_MAX_SIDE = 512
+    JPEG_QUALITY = 70
+
+    # Output budget for prompts that only return a coordinate pair
+    COORD_MAX_TOKENS = 128
+
+    # Minimum Tesseract word confidence (0-100) for trusting a local OCR email match
+    OCR_MIN_CONFIDENCE = 70
+
+    # Upper bound on concurrent Claude requests issued by analyze_batch and analyze_many
+    MAX_BATCH_WORKERS = 8
+
+    # Retries for rate-limited (429) or server-error (5xx) Claude requests.
+    # The SDK clients are built with max_retries=0 so attempts don't multiply.
+    MAX_RETRIES = 4
+    MAX_BACKOFF_SECONDS = 30
+
+    # Default analyses bundled into one analyze_screenshot request
+    DEFAULT_SCREENSHOT_TASKS = ("ui", "clickable", "messages")
+
+    # Parsed Claude responses are cached per image content and PROMPT_VERSION.
+    # Bump PROMPT_VERSION whenever a prompt changes so stale answers are not reused.
+    PROMPT_VERSION = "2"
+    RESPONSE_CACHE_SIZE = 512
+    RESPONSE_CACHE_TTL_SECONDS = 3600
+
+    # Shared across instances: {cache_key: (expires_at, {task: result})}
+    _response_cache = OrderedDict()
+    _response_cache_lock = threading.Lock()
 
     def __init__(self, api_key: Optional[str] = None):
         """
@@ -35,9 +554,35 @@ class ClaudeVisionAssistant:
             
         if not api_key:
             logger.warning("No API key provided for ClaudeVisionAssistant. Visual analysis will be limited.")
-            self.client = None
-        else:
-            self.client = Anthropic(api_key=api_key)
+        
+        # Clients are shared per API key and created on first use; see the
+        # client and aclient properties
+        self._api_key = api_key
+
+    
+    @property
+    def client(self) -> Optional[Anthropic]:
+        """
+        Synchronous Anthropic client, or None without an API key.
+        
+        One client per API key is shared by every instance, so pipelines that create
+        an assistant per request reuse a single HTTP connection pool.
+        """
+        if not self._api_key:
+            return None
+        return _get_client(self._api_key)
+    
+    @property
+    def aclient(self) -> Optional[AsyncAnthropic]:
+        """
+        Asynchronous Anthropic client, or None without an API key.
+        
+        Shared per API key like client, so creating an assistant per DM does not
+        open a new connection pool. It is closed at interpreter exit.
+        """
+        if not self._api_key:
+            return None
+        return _get_async_client(self._api_key)
     
     def identify_ui_elements(self, screenshot_path: str) -> Dict:
         """
@@ -52,83 +597,15 @@ class ClaudeVisionAssistant:
         if not self.client:
             logger.warning("No Claude client available. Cannot perform UI element identification.")
             return {}
-            
-        try:
-            # Check if screenshot exists
-            if not os.path.exists(screenshot_path):
-                logger.error(f"Screenshot not found at {screenshot_path}")
-                return {}
-                
-            # Read and encode the image
-            with open(screenshot_path, "rb") as f:
-                img_b64 = base64.b64encode(f.read()).decode('utf-8')
-                
-            # Create prompt for UI analysis
-            prompt = """
-            Analyze this Instagram direct message interface screenshot.
-            
-            Identify the following UI elements with their normalized coordinates (0-1 range where 0,0 is top left and 1,1 is bottom right):
-            1. Message input field (where users type messages)
-            2. Send button
-            3. Any visible user names or conversation entries
-            4. Back button (if visible)
-            5. Any visible message bubbles
-            
-            For each element, provide:
-            - The element type (e.g., input_field, send_button, etc.)
-            - The x, y coordinates of its center as normalized values between 0 and 1
-            - Any visible text associated with the element
-            
-            Return the results as a JSON object with this structure:
-            {
-                "input_field": {"x": 0.5, "y": 0.9, "text": ""},
-                "send_button": {"x": 0.9, "y": 0.9, "text": ""},
-                "conversations": [
-                    {"x": 0.2, "y": 0.3, "text": "User1"},
-                    {"x": 0.2, "y": 0.4, "text": "User2"}
-                ],
-                "back_button": {"x": 0.1, "y": 0.1, "text": "Back"},
-                "messages": [
-                    {"x": 0.7, "y": 0.5, "text": "Hello", "from_user": false},
-                    {"x": 0.3, "y": 0.6, "text": "Hi there", "from_user": true}
-                ]
-            }
-            """
-            
-            # Send request to Claude Vision
-            message = self.client.messages.create(
-                model=self.DEFAULT_MODEL,
-                max_tokens=1024,
-                messages=[
-                    {"role": "user", "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image", "source": {"type": "base64", "media_type": "image/png", "data": img_b64}}
-                    ]}
-                ]
-            )
-            
-            # Parse JSON from response
-            response_text = message.content[0].text
-            # Extract JSON from the response
-            json_match = re.search(r'```json\n(.*?)\n```', response_text, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON without code block markers
-                json_str = response_text[response_text.find("{"):response_text.rfind("}")+1]
-            
-            try:
-                ui_elements = json.loads(json_str)
-                logger.info(f"Successfully identified {len(ui_elements)} UI elements")
-                return ui_elements
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON from Claude response: {e}")
-                return {}
-                
-        except Exception as e:
-            logger.error(f"Error in identify_ui_elements: {str(e)}")
+        
+        # Check if screenshot exists
+        if not os.path.exists(screenshot_path):
+            logger.error(f"Screenshot not found at {screenshot_path}")
             return {}
+            
+        ui_elements = self.analyze_screenshot(screenshot_path, ("ui",))["ui"]
+        logger.info(f"Successfully identified {len(ui_elements)} UI elements")
+        return ui_elements
     
     def extract_messages(self, screenshot_path: str) -> List[Dict]:
         """
@@ -144,69 +621,9 @@ class ClaudeVisionAssistant:
             logger.warning("No Claude client available. Cannot perform message extraction.")
             return []
             
-        try:
-            # Read and encode the image
-            with open(screenshot_path, "rb") as f:
-                img_b64 = base64.b64encode(f.read()).decode('utf-8')
-                
-            # Create prompt for message extraction
-            prompt = """
-            Analyze this Instagram direct message conversation screenshot.
-            
-            Extract all visible messages from the conversation, identifying:
-            1. The message content
-            2. Who sent each message (the user or the other person)
-            3. Any timestamps or status indicators
-            
-            Return the results as a JSON array with this structure:
-            [
-                {
-                    "sender": "User" or the actual name if visible,
-                    "content": "The text content of the message",
-                    "timestamp": "Any visible timestamp" (optional),
-                    "is_user_message": true/false (whether the message was sent by the user)
-                },
-                ...
-            ]
-            
-            Only include messages where you can clearly read the content.
-            Order the messages from oldest to newest (top to bottom in the conversation).
-            """
-            
-            # Send request to Claude Vision
-            message = self.client.messages.create(
-                model=self.DEFAULT_MODEL,
-                max_tokens=1024,
-                messages=[
-                    {"role": "user", "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image", "source": {"type": "base64", "media_type": "image/png", "data": img_b64}}
-                    ]}
-                ]
-            )
-            
-            # Parse JSON from response
-            response_text = message.content[0].text
-            # Extract JSON from the response
-            json_match = re.search(r'```json\n(.*?)\n```', response_text, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON without code block markers
-                json_str = response_text[response_text.find("["):response_text.rfind("]")+1]
-            
-            try:
-                messages = json.loads(json_str)
-                logger.info(f"Successfully extracted {len(messages)} messages")
-                return messages
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON from Claude response: {e}")
-                return []
-                
-        except Exception as e:
-            logger.error(f"Error in extract_messages: {str(e)}")
-            return []
+        messages = self.analyze_screenshot(screenshot_path, ("messages",))["messages"]
+        logger.info(f"Successfully extracted {len(messages)} messages")
+        return messages
     
     def extract_emails(self, screenshot_path: str) -> List[str]:
         """
@@ -218,140 +635,100 @@ class ClaudeVisionAssistant:
         Returns:
             List[str]: List of extracted email addresses
         """
+        # Try local OCR first; only pay for a Claude Vision call when it finds nothing
+        emails = self._local_ocr_emails(screenshot_path)
+        if emails:
+            logger.info(f"Extracted {len(emails)} email addresses with local OCR")
+            return emails
+        
         if not self.client:
             logger.warning("No Claude client available. Cannot perform email extraction.")
             return []
             
         try:
-            # Read and encode the image
-            with open(screenshot_path, "rb") as f:
-                img_b64 = base64.b64encode(f.read()).decode('utf-8')
-                
-            # Create prompt for email extraction
-            prompt = """
-            Examine this screenshot and extract any email addresses visible in the image.
-            
-            Focus specifically on:
-            1. Messages that contain email addresses
-            2. Any form fields that have email addresses entered
-            3. Email addresses in any visible text
-            
-            Return only the email addresses as a JSON array of strings.
-            For example: ["user@example.com", "another@gmail.com"]
-            
-            If no email addresses are visible, return an empty array: []
-            """
-            
-            # Send request to Claude Vision
-            message = self.client.messages.create(
-                model=self.DEFAULT_MODEL,
-                max_tokens=1024,
-                messages=[
-                    {"role": "user", "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image", "source": {"type": "base64", "media_type": "image/png", "data": img_b64}}
-                    ]}
-                ]
-            )
-            
-            # Parse JSON from response
-            response_text = message.content[0].text
-            # Extract JSON from the response
-            json_match = re.search(r'```json\n(.*?)\n```', response_text, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON without code block markers
-                json_str = response_text[response_text.find("["):response_text.rfind("]")+1]
-                if not json_str:
-                    # If no JSON array found, try to extract emails using regex
-                    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-                    emails = re.findall(email_pattern, response_text)
-                    return emails
-            
-            try:
-                emails = json.loads(json_str)
+            response_text = self._vision_text_call(screenshot_path, _EMAILS_PROMPT)
+            emails = self._parse_vision_json(response_text, schema_hint="[")
+            if emails is not None:
                 logger.info(f"Successfully extracted {len(emails)} email addresses")
                 return emails
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON from Claude response: {e}")
-                
-                # Fallback: Try to extract emails using regex
-                email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-                emails = re.findall(email_pattern, response_text)
-                if emails:
-                    logger.info(f"Extracted {len(emails)} email addresses using regex fallback")
-                return emails
+            
+            # Fallback: Try to extract emails using regex
+            emails = _find_emails(response_text)
+            if emails:
+                logger.info(f"Extracted {len(emails)} email addresses using regex fallback")
+            return emails
                 
         except Exception as e:
             logger.error(f"Error in extract_emails: {str(e)}")
             return []
     
-    def analyze_instagram_content(self, image_path: str) -> Optional[Dict]:
+    def _local_ocr_emails(self, screenshot_path: str) -> List[str]:
+        """
+        Find email addresses in a screenshot using local Tesseract OCR.
+        
+        Only words recognized with confidence above OCR_MIN_CONFIDENCE are
+        considered, so a misread address escalates to Claude instead of being
+        returned.
+        
+        Args:
+            screenshot_path (str): Path to the screenshot file
+            
+        Returns:
+            List[str]: Unique email addresses in reading order; empty if OCR is
+            unavailable or finds none with high confidence
+        """
+        try:
+            with Image.open(screenshot_path) as img:
+                data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
+        except Exception as e:
+            logger.debug(f"Local OCR unavailable for {screenshot_path}: {e}")
+            return []
+        
+        text = " ".join(
+            word for word, conf in zip(data["text"], data["conf"])
+            if float(conf) > self.OCR_MIN_CONFIDENCE
+        )
+        return list(dict.fromkeys(_find_emails(text)))
+    
+    def analyze_instagram_content(self, image_path: str, high_fidelity: bool = False) -> Optional[Dict]:
         logger.info(f"🧠 ClaudeVision: analyzing screenshot {image_path}")
         """
         Send image to Claude Vision API with tailored prompt for analyzing shared IG posts.
+
+        Uses POST_ANALYSIS_MODEL on a POST_IMAGE_MAX_SIDE image by default; pass
+        high_fidelity=True to use DEFAULT_MODEL at full IMAGE_MAX_SIDE instead.
         """
         try:
-            with open(image_path, "rb") as image_file:
-                img_b64 = base64.b64encode(image_file.read()).decode("utf-8")
-
-                prompt = """
-                This is a screenshot of an Instagram DM thread. A user may have shared a post preview (e.g. video or photo thumbnail) and the DM interface may be visible.
-                
-                Please analyze the screenshot and return the following in **valid JSON**:
-                
-                - "is_shared_post": true or false — whether a shared post is present
-                - "post_url": the Instagram post URL if visible
-                - "confidence": a float between 0 and 1 for your certainty
-                - "summary": a 1-line summary of what the post appears to be about
-                - If visible, return the click target coordinates of the shared post preview as "click_target": {"x": ..., "y": ...}
-                - If the message input field is visible, return "message_box": {"x": ..., "y": ...}
-                - If the send button is visible, return "send_button": {"x": ..., "y": ...}
-                
-                Use normalized screen coordinates (0-1 range). Do not include any explanation — just return a single JSON object.
-                """
-                response = self.client.messages.create(
-                model=self.DEFAULT_MODEL,
-                max_tokens=1024,
+            if high_fidelity:
+                model, max_side, max_tokens = self.DEFAULT_MODEL, self.IMAGE_MAX_SIDE, 1024
+            else:
+                model, max_side, max_tokens = self.POST_ANALYSIS_MODEL, self.POST_IMAGE_MAX_SIDE, 256
+            
+            # Re-polled threads often produce byte-identical screenshots
+            task = "instagram_content_hf" if high_fidelity else "instagram_content"
+            cache_key = self._response_cache_key(image_path)
+            cached = self._cached_results(cache_key, (task,))
+            if task in cached:
+                return cached[task]
+            
+            text = self._vision_text_call(
+                image_path,
+                _INSTAGRAM_CONTENT_PROMPT,
+                model=model,
+                max_side=max_side,
+                max_tokens=max_tokens,
                 temperature=0.3,
-                system="You are an expert UI interpreter for Instagram screenshots.",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": "image/png",
-                                    "data": img_b64,
-                                },
-                            },
-                            {"type": "text", "text": prompt},
-                        ],
-                    }
-                ],
-            )
-
-            if hasattr(response, "content"):
-                text = response.content[0].text.strip()
-                logger.info(f"Claude raw response: {text}")
-
-                # Extract JSON block only
-                json_match = re.search(r'\{.*\}', text, re.DOTALL)
-                if not json_match:
-                    logger.error("No JSON object found in Claude response.")
-                    return None
-
-                json_str = json_match.group(0)
-
-                try:
-                    return json.loads(json_str)
-                except Exception as e:
-                    logger.error(f"Failed to parse extracted JSON block: {e}")
-                    return None
+                persona=_INSTAGRAM_CONTENT_SYSTEM
+            ).strip()
+            logger.debug("Claude raw response: %s", text)
+            
+            analysis = self._parse_vision_json(text)
+            if not isinstance(analysis, dict):
+                logger.error("No JSON object found in Claude response.")
+                return None
+            
+            self._cache_results(cache_key, {task: analysis})
+            return analysis
 
         except Exception as e:
             logger.error(f"Claude Vision error: {e}")
@@ -371,180 +748,379 @@ class ClaudeVisionAssistant:
             logger.warning("No Claude client available. Cannot perform clickable element identification.")
             return {}
             
-        try:
-            # Read and encode the image
-            with open(screenshot_path, "rb") as f:
-                img_b64 = base64.b64encode(f.read()).decode('utf-8')
-                
-            # Create prompt for clickable element identification
-            prompt = """
-            Analyze this Instagram interface screenshot and identify all clickable elements.
-            
-            For each clickable element, determine:
-            1. The element type (button, link, input, etc.)
-            2. The approximate center coordinates in normalized form (0-1 range)
-            3. The purpose or action associated with the element
-            4. Any visible text or icon description
-            
-            Focus on identifying these types of elements:
-            - Buttons (send, back, like, etc.)
-            - Input fields
-            - Navigation items
-            - Conversation entries
-            - Message bubbles that might be clickable
-            - Menu items
-            
-            Return the results as a JSON object with categories of elements:
-            {
-                "buttons": [
-                    {"x": 0.9, "y": 0.1, "purpose": "Back", "text": "←"},
-                    {"x": 0.95, "y": 0.9, "purpose": "Send", "text": "➤"}
-                ],
-                "inputs": [
-                    {"x": 0.5, "y": 0.9, "purpose": "Message input", "text": "Message..."}
-                ],
-                "navigation": [
-                    {"x": 0.1, "y": 0.2, "purpose": "Home", "text": "Home"}
-                ],
-                "conversations": [
-                    {"x": 0.3, "y": 0.3, "purpose": "Open conversation", "text": "John Doe"}
-                ]
-            }
-            """
-            
-            # Send request to Claude Vision
-            message = self.client.messages.create(
-                model=self.DEFAULT_MODEL,
-                max_tokens=1024,
-                messages=[
-                    {"role": "user", "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image", "source": {"type": "base64", "media_type": "image/png", "data": img_b64}}
-                    ]}
-                ]
-            )
-            
-            # Parse JSON from response
-            response_text = message.content[0].text
-            # Extract JSON from the response
-            json_match = re.search(r'```json\n(.*?)\n```', response_text, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON without code block markers
-                json_str = response_text[response_text.find("{"):response_text.rfind("}")+1]
-            
-            try:
-                clickable_elements = json.loads(json_str)
-                total_elements = sum(len(elements) for elements in clickable_elements.values())
-                logger.info(f"Successfully identified {total_elements} clickable elements")
-                return clickable_elements
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON from Claude response: {e}")
-                return {}
-                
-        except Exception as e:
-            logger.error(f"Error in identify_clickable_elements: {str(e)}")
-            return {}
+        clickable_elements = self.analyze_screenshot(screenshot_path, ("clickable",))["clickable"]
+        if logger.isEnabledFor(logging.INFO):
+            total_elements = sum(len(elements) for elements in clickable_elements.values() if isinstance(elements, list))
+            logger.info(f"Successfully identified {total_elements} clickable elements")
+        return clickable_elements
     
     def get_conversation_list(self, screenshot_path: str) -> List[Dict]:
         """
         Extract list of conversations from Instagram DM inbox screenshot.
         
+        Blocking wrapper around aget_conversation_list for synchronous callers.
+        
         Args:
             screenshot_path (str): Path to the screenshot file
             
         Returns:
             List[Dict]: List of conversations with position and details
         """
-        # First try to use the identify_ui_elements method which might have this info
-        ui_elements = self.identify_ui_elements(screenshot_path)
-        if ui_elements and "conversations" in ui_elements:
-            return ui_elements["conversations"]
-            
-        # If not found, use identify_clickable_elements which should have it
-        clickable_elements = self.identify_clickable_elements(screenshot_path)
-        if clickable_elements and "conversations" in clickable_elements:
-            return clickable_elements["conversations"]
+        if not self.aclient:
+            logger.warning("No Claude client available. Cannot perform conversation list extraction.")
+            return []
+        return self._run_async(self.aget_conversation_list(screenshot_path))
+    
+    async def aget_conversation_list(self, screenshot_path: str) -> List[Dict]:
+        """
+        Extract list of conversations from Instagram DM inbox screenshot.
+        
+        The specialized conversation-list analysis is asked first, since it is the
+        most reliable for this task. Only if it yields nothing are the generic UI and
+        clickable-element analyses requested, together in one call; their results
+        are cached for later identify_* calls on the same screenshot.
+        
+        Args:
+            screenshot_path (str): Path to the screenshot file
             
-        # If still not found, do a specialized extraction
-        if not self.client:
+        Returns:
+            List[Dict]: List of conversations with position and details
+        """
+        if not self.aclient:
             logger.warning("No Claude client available. Cannot perform conversation list extraction.")
             return []
+        
+        conversations = (await self.aanalyze_screenshot(screenshot_path, ("conversations",)))["conversations"]
+        if isinstance(conversations, list) and conversations:
+            logger.info(f"Successfully extracted {len(conversations)} conversations")
+            return conversations
+        
+        # Fall back to the generic analyses, preferring UI elements over clickable elements
+        results = await self.aanalyze_screenshot(screenshot_path, ("ui", "clickable"))
+        for elements in (results["ui"], results["clickable"]):
+            if elements and "conversations" in elements:
+                return elements["conversations"]
+        return []
+    
+    async def aidentify_ui_elements(self, screenshot_path: str) -> Dict:
+        """Async counterpart of identify_ui_elements."""
+        if not os.path.exists(screenshot_path):
+            logger.error(f"Screenshot not found at {screenshot_path}")
+            return {}
+        return (await self.aanalyze_screenshot(screenshot_path, ("ui",)))["ui"]
+    
+    async def aidentify_clickable_elements(self, screenshot_path: str) -> Dict[str, List[Dict]]:
+        """Async counterpart of identify_clickable_elements."""
+        return (await self.aanalyze_screenshot(screenshot_path, ("clickable",)))["clickable"]
+    
+    async def aextract_messages(self, screenshot_path: str) -> List[Dict]:
+        """Async counterpart of extract_messages."""
+        return (await self.aanalyze_screenshot(screenshot_path, ("messages",)))["messages"]
+    
+    async def analyze_many(
+        self,
+        screenshot_paths: List[str],
+        tasks: Tuple[str, ...] = DEFAULT_SCREENSHOT_TASKS
+    ) -> List[Dict]:
+        """
+        Analyze many screenshots concurrently.
+        
+        Requests overlap on the AsyncAnthropic client, with at most
+        MAX_BATCH_WORKERS in flight. Synchronous callers can use analyze_batch.
+        
+        Args:
+            screenshot_paths (List[str]): Paths to the screenshot files
+            tasks (Tuple[str, ...]): Analyses to run on each screenshot, as for analyze_screenshot
             
-        try:
-            # Read and encode the image
-            with open(screenshot_path, "rb") as f:
-                img_b64 = base64.b64encode(f.read()).decode('utf-8')
-                
-            # Create prompt for conversation list extraction
-            prompt = """
-            Analyze this Instagram Direct Messages inbox screenshot.
+        Returns:
+            List[Dict]: analyze_screenshot results in the same order as screenshot_paths
+        """
+        semaphore = asyncio.Semaphore(self.MAX_BATCH_WORKERS)
+        
+        async def analyze(path: str) -> Dict:
+            async with semaphore:
+                return await self.aanalyze_screenshot(path, tasks)
+        
+        return await asyncio.gather(*(analyze(path) for path in screenshot_paths))
+    
+    def analyze_screenshot(self, screenshot_path: str, tasks: Tuple[str, ...] = DEFAULT_SCREENSHOT_TASKS) -> Dict:
+        """
+        Run several analyses of one screenshot in a single Claude request.
+        
+        The image is uploaded once and the model answers every task in one JSON
+        object. Results are cached per image content (see PROMPT_VERSION), so asking
+        again for any already-answered task on the same screenshot costs no API call.
+        
+        Args:
+            screenshot_path (str): Path to the screenshot file
+            tasks (Tuple[str, ...]): Any of "ui", "clickable", "messages", "conversations"
             
-            Identify all visible conversations in the left sidebar or main view.
-            For each conversation entry, provide:
-            1. The name of the user or group
-            2. The position (normalized x,y coordinates of the center)
-            3. Any visible message preview or status
-            4. Whether the conversation appears to have unread messages
+        Returns:
+            Dict: Result per task; a task that failed maps to an empty dict or list
+        """
+        if not self.client:
+            logger.warning("No Claude client available. Cannot analyze screenshot.")
+            return self._with_task_defaults({}, tasks)
+        
+        results = {}
+        try:
+            cache_key = self._response_cache_key(screenshot_path)
+            results = self._cached_results(cache_key, tasks)
+            missing = [task for task in tasks if task not in results]
+            if missing:
+                message = self._call_with_retry(
+                    self.client.messages.create, **self._screenshot_tasks_request(screenshot_path, missing)
+                )
+                results.update(self._parse_screenshot_tasks(message, missing))
+                self._cache_results(cache_key, results)
+        except Exception as e:
+            logger.error(f"Error in analyze_screenshot: {str(e)}")
+        
+        return self._with_task_defaults(results, tasks)
+    
+    async def aanalyze_screenshot(self, screenshot_path: str, tasks: Tuple[str, ...] = DEFAULT_SCREENSHOT_TASKS) -> Dict:
+        """
+        Async counterpart of analyze_screenshot using the AsyncAnthropic client.
+        
+        File hashing and image preparation are blocking, so they run in worker
+        threads and other screenshots' requests keep progressing on the event loop.
+        Safe to await from any event loop, including successive asyncio.run()
+        calls: the API request itself runs on the shared background loop.
+        """
+        if not self.aclient:
+            logger.warning("No Claude client available. Cannot analyze screenshot.")
+            return self._with_task_defaults({}, tasks)
+        
+        results = {}
+        try:
+            cache_key = await asyncio.to_thread(self._response_cache_key, screenshot_path)
+            results = self._cached_results(cache_key, tasks)
+            missing = [task for task in tasks if task not in results]
+            if missing:
+                request = await asyncio.to_thread(self._screenshot_tasks_request, screenshot_path, missing)
+                # The shared client lives on the background loop, not the caller's
+                message = await _on_background_loop(
+                    self._acall_with_retry(self.aclient.messages.create, **request)
+                )
+                results.update(self._parse_screenshot_tasks(message, missing))
+                self._cache_results(cache_key, results)
+        except Exception as e:
+            logger.error(f"Error in analyze_screenshot: {str(e)}")
+        
+        return self._with_task_defaults(results, tasks)
+    
+    def _screenshot_tasks_request(self, screenshot_path: str, tasks: List[str]) -> Dict:
+        """
+        Build the messages.create arguments asking for every task in one response.
+        
+        The model is forced to answer through a tool whose input schema has one
+        property per task, so the result arrives as structured JSON rather than prose.
+        """
+        if len(tasks) == 1:
+            prompt = _SCREENSHOT_TASKS[tasks[0]][0]
+        else:
+            prompt = _COMBINED_TASKS_PROMPT.format(keys=", ".join(tasks))
+            prompt += "".join(f"\n## {task}\n{_SCREENSHOT_TASKS[task][0]}" for task in tasks)
+        
+        request = self._vision_request(screenshot_path, prompt, max_tokens=min(1024 * len(tasks), 4096))
+        request["tools"] = [{
+            "name": _SCREENSHOT_TOOL_NAME,
+            "description": "Record the results of the requested screenshot analyses.",
+            "input_schema": {
+                "type": "object",
+                "properties": {task: _SCREENSHOT_TASKS[task][1] for task in tasks},
+                "required": list(tasks),
+            },
+        }]
+        request["tool_choice"] = {"type": "tool", "name": _SCREENSHOT_TOOL_NAME}
+        return request
+    
+    @staticmethod
+    def _parse_screenshot_tasks(message, tasks: List[str]) -> Dict:
+        """Pull per-task results out of the forced tool call in an analyze_screenshot response."""
+        for block in message.content:
+            if block.type == "tool_use" and isinstance(block.input, dict):
+                return {task: block.input[task] for task in tasks if task in block.input}
+        logger.error("Claude response contained no screenshot analysis tool call")
+        return {}
+    
+    @staticmethod
+    def _with_task_defaults(results: Dict, tasks: Tuple[str, ...]) -> Dict:
+        """Fill tasks without a result with an empty value of their JSON type."""
+        return {
+            task: results[task] if task in results else ([] if _SCREENSHOT_TASKS[task][1]["type"] == "array" else {})
+            for task in tasks
+        }
+    
+    def _response_cache_key(self, path: str) -> str:
+        """Cache key for a screenshot: SHA-256 of its bytes plus the prompt version."""
+        with open(path, "rb") as f:
+            return f"{hashlib.sha256(f.read()).hexdigest()}:{self.PROMPT_VERSION}"
+    
+    def _cached_results(self, cache_key: str, tasks: Tuple[str, ...]) -> Dict:
+        """Return unexpired cached results for the tasks already answered for this image."""
+        with self._response_cache_lock:
+            entry = self._response_cache.get(cache_key)
+            if entry is None:
+                return {}
+            expires_at, results = entry
+            if expires_at < time.monotonic():
+                del self._response_cache[cache_key]
+                return {}
+            self._response_cache.move_to_end(cache_key)
+            return {task: results[task] for task in tasks if task in results}
+    
+    def _cache_results(self, cache_key: str, results: Dict):
+        """Cache task results for an image, evicting the least recently used images."""
+        with self._response_cache_lock:
+            entry = self._response_cache.get(cache_key)
+            merged = {**entry[1], **results} if entry else dict(results)
+            self._response_cache[cache_key] = (time.monotonic() + self.RESPONSE_CACHE_TTL_SECONDS, merged)
+            self._response_cache.move_to_end(cache_key)
+            while len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+    
+    def _vision_request(
+        self,
+        screenshot_path: str,
+        prompt: str,
+        model: Optional[str] = None,
+        max_side: Optional[int] = None,
+        max_tokens: int = 1024,
+        temperature: Optional[float] = None,
+        persona: Optional[str] = None
+    ) -> Dict:
+        """
+        Build the messages.create arguments for a single-screenshot vision prompt.
+        
+        Args:
+            screenshot_path (str): Path to the screenshot file
+            prompt (str): Instruction text sent alongside the image
+            model (str, optional): Model override; defaults to DEFAULT_MODEL
+            max_side (int, optional): Downscale bound; defaults to IMAGE_MAX_SIDE
+            max_tokens (int): Output token limit
+            temperature (float, optional): Sampling temperature; API default if omitted
+            persona (str, optional): System prompt for the request
             
-            Return the results as a JSON array:
-            [
-                {
-                    "name": "User Name",
-                    "x": 0.2,
-                    "y": 0.3,
-                    "preview": "Last message preview if visible",
-                    "unread": true/false,
-                    "active_status": "Active status if visible"
-                },
-                ...
+        Returns:
+            Dict: Keyword arguments for messages.create
+        """
+        img_b64, media_type = self._load_and_prep(screenshot_path, max_side)
+        
+        request = {
+            "model": model or self.DEFAULT_MODEL,
+            "max_tokens": max_tokens,
+            "messages": [
+                {"role": "user", "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image", "source": {"type": "base64", "media_type": media_type, "data": img_b64}}
+                ]}
             ]
+        }
+        if persona:
+            request["system"] = persona
+        if temperature is not None:
+            request["temperature"] = temperature
+        return request
+    
+    @staticmethod
+    def _parse_vision_json(response_text: str, schema_hint: str = "{") -> Optional[Union[Dict, List]]:
+        """
+        Parse the JSON payload out of a Claude response.
+        
+        Prefers a ```json fenced block and otherwise takes the first balanced
+        object ("{") or array ("[") in the text.
+        
+        Args:
+            response_text (str): Raw response text
+            schema_hint (str): Opening bracket of the expected top-level JSON value
             
-            Order the conversations from top to bottom as they appear in the interface.
-            """
-            
-            # Send request to Claude Vision
-            message = self.client.messages.create(
-                model=self.DEFAULT_MODEL,
-                max_tokens=1024,
-                messages=[
-                    {"role": "user", "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image", "source": {"type": "base64", "media_type": "image/png", "data": img_b64}}
-                    ]}
-                ]
-            )
-            
-            # Parse JSON from response
-            response_text = message.content[0].text
-            # Extract JSON from the response
-            json_match = re.search(r'```json\n(.*?)\n```', response_text, re.DOTALL)
+        Returns:
+            Dict or List or None: Parsed JSON, or None if no valid JSON was found
+        """
+        # Extract JSON from the response
+        json_match = _JSON_FENCE_RE.search(response_text)
+        
+        if json_match:
+            json_str = json_match.group(1)
+        else:
+            # Try to find JSON without code block markers
+            close_c = "]" if schema_hint == "[" else "}"
+            json_str = _extract_first_json(response_text, schema_hint, close_c) or ""
+        
+        try:
+            return json_loads(json_str)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse JSON from Claude response: {e}")
+            return None
+    
+    def _vision_text_call(self, screenshot_path: str, prompt: str, **request_kwargs) -> str:
+        """Send a screenshot and prompt to Claude and return the response text."""
+        message = self._call_with_retry(
+            self.client.messages.create, **self._vision_request(screenshot_path, prompt, **request_kwargs)
+        )
+        return message.content[0].text
+    
+    def _vision_json_call(
+        self,
+        screenshot_path: str,
+        prompt: str,
+        schema_hint: str = "{",
+        **request_kwargs
+    ) -> Optional[Union[Dict, List]]:
+        """
+        Send a screenshot and prompt to Claude and return the parsed JSON response.
+        
+        Every JSON-returning vision method goes through here, so image preparation,
+        encoding and response parsing live in one place.
+        
+        Args:
+            screenshot_path (str): Path to the screenshot file
+            prompt (str): Instruction text sent alongside the image
+            schema_hint (str): "{" for an object response, "[" for an array
+            **request_kwargs: model, max_side or max_tokens overrides for _vision_request
             
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON without code block markers
-                json_str = response_text[response_text.find("["):response_text.rfind("]")+1]
+        Returns:
+            Dict or List or None: Parsed JSON, or None if the response held no valid JSON.
+            API errors are raised to the caller.
+        """
+        response_text = self._vision_text_call(screenshot_path, prompt, **request_kwargs)
+        return self._parse_vision_json(response_text, schema_hint)
+    
+    def analyze_batch(self, screenshot_paths: List[str], method: str = "identify_ui_elements") -> List:
+        """
+        Run one analysis method over several screenshots in parallel.
+        
+        Claude calls are network-bound, so a small thread pool overlaps them while the
+        shared client reuses its connection pool.
+        
+        Args:
+            screenshot_paths (List[str]): Paths to the screenshot files
+            method (str): Name of the single-screenshot method to run, e.g. "extract_messages"
             
-            try:
-                conversations = json.loads(json_str)
-                logger.info(f"Successfully extracted {len(conversations)} conversations")
-                return conversations
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON from Claude response: {e}")
-                return []
-                
-        except Exception as e:
-            logger.error(f"Error in get_conversation_list: {str(e)}")
+        Returns:
+            List: Results in the same order as screenshot_paths
+        """
+        analyze = getattr(self, method, None)
+        if method.startswith("_") or not callable(analyze):
+            raise ValueError(f"Unknown analysis method: {method}")
+        if not screenshot_paths:
             return []
-
-    def extract_structured_post_data(self, dm_data: Dict) -> Dict:
+        
+        with ThreadPoolExecutor(
+            max_workers=min(self.MAX_BATCH_WORKERS, len(screenshot_paths)),
+            thread_name_prefix="claude-vision"
+        ) as executor:
+            return list(executor.map(analyze, screenshot_paths))
+    
+    def extract_structured_post_data(self, dm_data: Dict, pre_analyzed: Optional[Dict] = None) -> Dict:
         logger.info(f"🧠 Extracting structured post data from: {list(dm_data.keys())}")
         """
         Extract a structured post object from a DM message or screenshot.
         Returns keys: post_url, caption_text, confidence, source_type
+
+        Pass pre_analyzed with an existing analyze_instagram_content result for
+        dm_data["screenshot_path"] to skip a second Claude call.
         """
         result = {
             "post_url": None,
@@ -555,7 +1131,7 @@ class ClaudeVisionAssistant:
 
         try:
             if dm_data.get("screenshot_path"):
-                analysis = self.analyze_instagram_content(dm_data["screenshot_path"])
+                analysis = pre_analyzed or self.analyze_instagram_content(dm_data["screenshot_path"])
                 if not analysis:
                     logger.warning("Claude Vision returned no analysis.")
                     return result
@@ -582,7 +1158,7 @@ class ClaudeVisionAssistant:
                     # Proceed with recipe extraction, PDF generation, and reply
 
             elif dm_data.get("html_block"):
-                url_match = re.search(r"https://www.instagram.com/[^\s\"']+", dm_data["html_block"])
+                url_match = _search_instagram_url(dm_data["html_block"])
                 if url_match:
                     result.update({
                         "post_url": url_match.group(0),
@@ -591,7 +1167,7 @@ class ClaudeVisionAssistant:
                     })
 
             elif dm_data.get("message"):
-                url_match = re.search(r"https://www.instagram.com/[^\s\"']+", dm_data["message"])
+                url_match = _search_instagram_url(dm_data["message"])
                 if url_match:
                     result.update({
                         "post_url": url_match.group(0),
@@ -602,7 +1178,7 @@ class ClaudeVisionAssistant:
                     # Fallback: if message indicates a blog recipe, extract blog URL
                     msg_lower = dm_data["message"].lower()
                     if "full recipe" in msg_lower and "blog" in msg_lower:
-                        blog_url_match = re.search(r"https?://(?:www\.)?[\w.-]+\.[a-z]{2,}(?:/[^\s\"']+)?", dm_data["message"])
+                        blog_url_match = _BLOG_URL_RE.search(dm_data["message"])
                         if blog_url_match:
                             result.update({
                                 "post_url": blog_url_match.group(0),
@@ -626,23 +1202,14 @@ class ClaudeVisionAssistant:
         Ask Claude to locate the shared post preview in a screenshot.
         Returns normalized coordinates (0-1 range) if found.
         """
-        prompt = """
-        You are an expert UI assistant. The attached screenshot is from an Instagram DM thread.
-
-        A user has shared a post preview (e.g. a video thumbnail or image preview). 
-        Please locate the preview of that shared post.
-
-        Respond in JSON:
-        {
-            "x": 0.5,  // normalized X coordinate (0 to 1)
-            "y": 0.6   // normalized Y coordinate (0 to 1)
-        }
-
-        Only respond with the JSON. Do not include any explanation.
-        """
-
         try:
-            response = self.analyze_image_and_get_json(screenshot_path, prompt)
+            response = self.analyze_image_and_get_json(
+                screenshot_path,
+                _SHARED_POST_COORDS_PROMPT,
+                max_side=self.COARSE_IMAGE_MAX_SIDE,
+                model=self.COARSE_MODEL,
+                max_tokens=self.COORD_MAX_TOKENS
+            )
             if response and "x" in response and "y" in response:
                 return {"x": float(response["x"]), "y": float(response["y"])}
         except Exception as e:
@@ -651,32 +1218,22 @@ class ClaudeVisionAssistant:
         return None
     
 
-    def analyze_image_and_get_json(self, screenshot_path: str, prompt: str) -> Dict:
+    def analyze_image_and_get_json(
+        self,
+        screenshot_path: str,
+        prompt: str,
+        max_side: Optional[int] = None,
+        model: Optional[str] = None,
+        max_tokens: int = 1024
+    ) -> Dict:
         """
         Send a screenshot and prompt to Claude Vision and return the parsed JSON response.
         """
         try:
-            with open(screenshot_path, "rb") as f:
-                img_b64 = base64.b64encode(f.read()).decode("utf-8")
-
-            message = self.client.messages.create(
-                model=self.DEFAULT_MODEL,
-                max_tokens=1024,
-                messages=[{
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image", "source": {"type": "base64", "media_type": "image/png", "data": img_b64}}
-                    ]
-                }]
+            result = self._vision_json_call(
+                screenshot_path, prompt, model=model, max_side=max_side, max_tokens=max_tokens
             )
-
-            match = re.search(r"\{.*?\}", message.content[0].text, re.DOTALL)
-            if match:
-                return json.loads(match.group(0))
-            else:
-                logger.error("No JSON object found in Claude response.")
-                return {}
+            return result if result is not None else {}
         except Exception as e:
             logger.error(f"analyze_image_and_get_json failed: {e}")
             return {}
@@ -685,20 +1242,7 @@ class ClaudeVisionAssistant:
         """
         Given a screenshot of an Instagram post, ask Claude to return caption and metadata.
         """
-        prompt = """
-        This is a screenshot of an Instagram post.
-
-        Please extract the following in JSON format:
-        {
-        "caption": "...",
-        "hashtags": ["...", "..."],
-        "mentions": ["..."],
-        "urls": ["..."]
-        }
-
-        Only include fields if present. Return clean JSON only.
-        """
-        return self.analyze_image_and_get_json(screenshot_path, prompt)
+        return self.analyze_image_and_get_json(screenshot_path, _POST_CONTENT_PROMPT)
 
     def get_click_target_from_screenshot(self, screenshot_path: str, target_name: str = "Shahin Zangenehpour") -> Optional[Dict[str, float]]:
         """
@@ -716,48 +1260,16 @@ class ClaudeVisionAssistant:
             return None
  
         try:
-            with open(screenshot_path, "rb") as f:
-                img_b64 = base64.b64encode(f.read()).decode("utf-8")
- 
-            prompt = f"""
-            You are an expert UI assistant. This is a screenshot of the Instagram DM interface.
- 
-            Please locate the conversation tile that includes the name "{target_name}" on the left-hand sidebar.
- 
-            Return a JSON object like:
-            {{
-                "click_target": {{ "x": float, "y": float }},
-                "reasoning": "why you chose this location"
-            }}
- 
-            Only return JSON. No extra commentary.
-            """
- 
-            message = self.client.messages.create(
-                model=self.DEFAULT_MODEL,
-                max_tokens=1024,
+            result = self._vision_json_call(
+                screenshot_path,
+                _CLICK_TARGET_PROMPT.format(target_name=target_name),
+                model=self.COARSE_MODEL,
+                max_side=self.COARSE_IMAGE_MAX_SIDE,
+                max_tokens=self.COORD_MAX_TOKENS,
                 temperature=0.3,
-                system="You are an expert UI interpreter for Instagram screenshots.",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "image", "source": {
-                                "type": "base64", "media_type": "image/png", "data": img_b64
-                            }},
-                            {"type": "text", "text": prompt}
-                        ]
-                    }
-                ]
+                persona=_INSTAGRAM_CONTENT_SYSTEM
             )
- 
-            if hasattr(message, "content"):
-                text = message.content[0].text.strip()
-                logger.info(f"Claude raw response: {text}")
-                match = re.search(r"\{.*\}", text, re.DOTALL)
-                if match:
-                    return json.loads(match.group(0)).get("click_target")
-            return None
+            return result.get("click_target") if isinstance(result, dict) else None
         except Exception as e:
             logger.error(f"get_click_target_from_screenshot failed: {e}")
             return None
@@ -766,91 +1278,195 @@ class ClaudeVisionAssistant:
         """
         Returns a list of click coordinates for unread DM threads, identified by blue dot indicator.
         """
-        prompt = (
-            "You are viewing the Instagram DM interface. Your task is to locate all unread DM threads in the left panel. "
-            "These are visually identified by a small blue dot on the right edge of the conversation tile.\n\n"
-            "Please return a list of click coordinates `(x, y)` — one per unread thread — to click the center of the profile picture "
-            "or tile to open each thread. The coordinates should be normalized between 0 and 1, and listed from bottom to top, "
-            "in reverse vertical order.\n\n"
-            "Only include threads with a blue dot. Do not include any read threads."
-        )
-        with open(screenshot_path, "rb") as f:
-            encoded = base64.b64encode(f.read()).decode("utf-8")
-        image_data = encoded
-        response = self._call_claude_vision(prompt, image_data)
+        response = self._call_claude_vision(_UNREAD_THREADS_PROMPT, screenshot_path)
         
         if isinstance(response, list):
-            logger.info(f"🔵 Claude returned {len(response)} unread thread targets.")
-            for i, coords in enumerate(response):
-                logger.info(f"    [{i}] x: {coords['x']:.3f}, y: {coords['y']:.3f}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"🔵 Claude returned {len(response)} unread thread targets.")
+                for i, coords in enumerate(response):
+                    logger.info(f"    [{i}] x: {coords['x']:.3f}, y: {coords['y']:.3f}")
             return response
         else:
             logger.warning("⚠️ Claude did not return a list of unread threads.")
             return []
     
+    @classmethod
+    def _prepare_image(cls, image_path: str, max_side: int, quality: Optional[int] = None) -> memoryview:
+        """
+        Downscale an image to fit within max_side x max_side and re-encode it as JPEG.
+
+        Device screenshots are far larger than the vision model needs; shrinking
+        them cuts upload size, image tokens and base64 work.
+
+        Args:
+            image_path (str): Path to the image file
+            max_side (int): Maximum width/height in pixels
+            quality (int, optional): JPEG quality; defaults to JPEG_QUALITY
+
+        Returns:
+            memoryview: JPEG-encoded image data (a view over the output buffer, not a copy)
+        """
+        with Image.open(image_path) as img:
+            # JPEGs that already fit are uploaded as-is instead of being decoded and re-compressed
+            if img.format == "JPEG" and max(img.size) <= max_side:
+                img.fp.seek(0)
+                return memoryview(img.fp.read())
+            # Let JPEG sources decode straight to a reduced size (no-op for PNG)
+            img.draft("RGB", (max_side, max_side))
+            if img.mode not in ("RGB", "RGBA", "L"):
+                img = img.convert("RGB")
+            # Shrink before converting so no full-resolution RGB copy is made
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            buf = io.BytesIO()
+            img.save(buf, "JPEG", quality=quality or cls.JPEG_QUALITY, optimize=True)
+        return buf.getbuffer()
+
+    def _load_and_prep(self, image_path: str, max_side: Optional[int] = None) -> Tuple[str, str]:
+        """
+        Prepare an image for a Claude image block.
+
+        Args:
+            image_path (str): Path to the image file
+            max_side (int, optional): Maximum width/height; defaults to IMAGE_MAX_SIDE
+
+        Returns:
+            Tuple[str, str]: Base64-encoded image data and its media type
+        """
+        return self._encode_image_base64(image_path, max_side), "image/jpeg"
+
+    def _encode_image_base64(self, image_path: str, max_side: Optional[int] = None) -> str:
+        """
+        Base64-encode a downscaled JPEG of an image.
+
+        Results are memoized per (path, mtime, size, max_side, JPEG_QUALITY), so each
+        screenshot is read and encoded at most once per process even when several
+        methods analyze it.
+
+        Args:
+            image_path (str): Path to the image file
+            max_side (int, optional): Maximum width/height; defaults to IMAGE_MAX_SIDE
+
+        Returns:
+            str: Base64-encoded JPEG data
+        """
+        stat = os.stat(image_path)
+        return self._encoded_image(
+            image_path, stat.st_mtime_ns, stat.st_size, max_side or self.IMAGE_MAX_SIDE, self.JPEG_QUALITY
+        )
+
+    @classmethod
+    @functools.lru_cache(maxsize=32)
+    def _encoded_image(cls, image_path: str, mtime_ns: int, size: int, max_side: int, quality: int) -> str:
+        """
+        Encode an image, keeping the result in memory only.
+
+        mtime_ns and size come from the caller's single os.stat of the image, so
+        re-captured screenshots miss the cache. quality is part of the key, so
+        changing JPEG_QUALITY never serves a stale encoding. Nothing is written
+        next to the screenshot.
+        """
+        return b64encode_as_string(cls._prepare_image(image_path, max_side, quality))
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Return True for rate-limit and server-side API errors worth retrying."""
+        return isinstance(error, RateLimitError) or (
+            isinstance(error, APIStatusError) and error.status_code >= 500
+        )
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter for the given zero-based retry attempt."""
+        return min(2 ** attempt, self.MAX_BACKOFF_SECONDS) + random.random() * 0.5
+
+    def _call_with_retry(self, fn, *args, **kwargs):
+        """
+        Call fn, retrying with exponential backoff on 429 and 5xx API errors.
+
+        The prepared request is reused across attempts, so a transient failure does
+        not repeat image preparation. Other errors, and the last retryable one, are
+        raised to the caller.
+        """
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.MAX_RETRIES or not self._is_retryable(e):
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"Claude request failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    async def _acall_with_retry(self, fn, *args, **kwargs):
+        """Async counterpart of _call_with_retry for AsyncAnthropic calls."""
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.MAX_RETRIES or not self._is_retryable(e):
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"Claude request failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def _run_async(self, coro):
+        """
+        Run a coroutine on the shared background event loop and wait for its result.
+
+        A single long-lived loop keeps the AsyncAnthropic connection pool bound to one
+        live loop, and works whether or not the caller is itself inside a running loop.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
     def _load_image_as_base64(self, image_path):
-        import base64
         if not os.path.exists(image_path):
             logger.error(f"Screenshot not found at {image_path}")
             return ""
 
-        with open(image_path, "rb") as f:
-            encoded = base64.b64encode(f.read()).decode("utf-8")
+        encoded = self._encode_image_base64(image_path)
         if not encoded:
             logger.error("Base64 encoding failed: empty result.")
         else:
             logger.debug(f"Base64 sample: {encoded[:100]}...")
-        return f"data:image/png;base64,{encoded}"
+        return f"data:image/jpeg;base64,{encoded}"
 
-    def _call_claude_vision(self, prompt: str, image_data: str) -> Union[Dict, List, str]:
+    def _call_claude_vision(self, prompt: str, image_path: str) -> Union[Dict, List, str]:
+        """
+        Ask a free-form question about a screenshot.
+        
+        Returns the first JSON value in the answer, a list of (x, y) tuples parsed
+        into coordinate dicts, or the raw text when neither is present.
+        """
         try:
-            message = self.client.messages.create(
-                model=self.DEFAULT_MODEL,
-                max_tokens=1024,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {"type": "image", "source": {
-                                "type": "base64",
-                                "media_type": "image/png",
-                                "data": image_data
-                            }}
-                        ]
-                    }
-                ]
-            )
-            if hasattr(message, "content"):
-                text = message.content[0].text.strip()
-                logger.info(f"Claude raw response: {text}")
-
-                match = re.search(r"\[.*\]|\{.*\}", text, re.DOTALL)
-                if match:
-                    try:
-                        return json.loads(match.group(0))
-                    except json.JSONDecodeError:
-                        pass
-
-                # Fallback: try parsing raw tuple lines like (0.175, 0.65)
-                tuple_matches = re.findall(r"\((\d*\.\d+),\s*(\d*\.\d+)\)", text)
-                if tuple_matches:
-                    return [{"x": float(x), "y": float(y)} for x, y in tuple_matches]
-
-                # If nothing matched, just return raw text
-                return text
+            text = self._vision_text_call(image_path, prompt).strip()
+            logger.debug("Claude raw response: %s", text)
+
+            # Take whichever JSON value, array or object, starts first
+            array_at, object_at = text.find("["), text.find("{")
+            if array_at != -1 and (object_at == -1 or array_at < object_at):
+                json_str = _extract_first_json(text, "[", "]")
+            else:
+                json_str = _extract_first_json(text)
+            if json_str:
+                try:
+                    return json_loads(json_str)
+                except json.JSONDecodeError:
+                    pass
+
+            # Fallback: try parsing raw tuple lines like (0.175, 0.65)
+            tuple_matches = _COORD_TUPLE_RE.findall(text)
+            if tuple_matches:
+                return [{"x": float(x), "y": float(y)} for x, y in tuple_matches]
+
+            # If nothing matched, just return raw text
+            return text
         except Exception as e:
             logger.error(f"_call_claude_vision failed: {e}")
             return {}
         
     def extract_dm_handle(self, image_path):
-        image_data = self._encode_image_base64(image_path)
-        prompt = (
-            "You're looking at an Instagram DM conversation. "
-            "What is the visible username or account handle of the other person in this chat? "
-            "Return only the handle as a plain string, like @chefjohn."
-        )
-        response = self._call_claude_vision(prompt, image_data)
+        response = self._call_claude_vision(_DM_HANDLE_PROMPT, image_path)
         if isinstance(response, str):
             clean = response.strip().split()[0]
             if clean.startswith("@"):
@@ -869,28 +1485,8 @@ class ClaudeVisionAssistant:
         - Post URL and caption
         - Message box and send button locations
         """
-        prompt = """
-        You are analyzing a screenshot of the Instagram inbox (DM list view).
-
-        Your task is to:
-        1. Identify any unread conversation threads. These are visually marked by a small **blue dot on the right side** of the thread row.
-        2. If multiple unread threads are present, return the **lowest one on the list** (bottom-most unread thread).
-        3. Return the normalized coordinates for clicking — not on the blue dot, but on the **center of the unread conversation tile**, typically where the profile image or name is. Do NOT click the blue dot itself.
-
-        You should also return:
-        - "handle": the username or name next to the blue dot
-        - "is_shared_post": false (in this inbox view it's not visible)
-        - "message_box" and "send_button": null
-        - "post_url" and "caption": null
-        - "confidence": float between 0 and 1 indicating how sure you are that it's an unread thread
-
-        Return only JSON — no explanation or extra text.
-        """
         try:
-            with open(screenshot_path, "rb") as f:
-                image_data = base64.b64encode(f.read()).decode("utf-8")
- 
-            response = self._call_claude_vision(prompt, image_data)
+            response = self._call_claude_vision(_DM_THREAD_PROMPT, screenshot_path)
             if isinstance(response, dict):
                 logger.info("✅ Unified thread analysis successful.")
                 return response
@@ -3,13 +3,18 @@ Conversation handler for the Instagram Recipe Agent onboarding flow.
 Manages the conversation flow and responses based on user input.
 """
 
+import asyncio
+import atexit
 import logging
 import re
 import os
 import threading
 import time
-import traceback
-from typing import Dict, Tuple, Optional
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple, Optional
 
 from archive.instagram_monitor import InstagramMonitor
 from archive.recipe_extractor import RecipeExtractor
@@ -25,15 +30,49 @@ from src.utils.message_templates import (
     INVALID_URL,
     EXTRACTION_ERROR,
     PROCESSING_ERROR,
+    DELIVERY_ERROR,
+    SERVICE_BUSY,
     INVALID_EMAIL
 )
 from src.utils.user_state import UserStateManager, STATE_NEW, STATE_AWAITING_EMAIL, STATE_AWAITING_URL, STATE_PROCESSING
 
 logger = logging.getLogger(__name__)
 
+# Patterns used by email extraction, compiled once at import
+_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+_NON_EMAIL_PUNCT_RE = re.compile(r'[^\w\s@.-]')
+_WS_RE = re.compile(r'\s+')
+_EMAIL_LOOSE_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b')
+_CLEAN_RE = re.compile(r'[^a-zA-Z0-9.@_+-]')
+_UI_WORDS_RE = re.compile(r'react|reply|more|enter|send|close', re.IGNORECASE)
+
+# Substrings that mark a message as shared recipe content
+_FOOD_KEYWORDS = frozenset({'recipe', 'cook', 'food', 'meal', 'dish', 'bake', 'ingredient'})
+_INSTAGRAM_ACCOUNTS = frozenset({'kauscooks', 'hungry.happens', 'recipe', 'food'})
+_SHARE_KEYWORDS = frozenset({'recipe', 'cook', 'food'})
+
+# One pass over the message finds every keyword, overlapping ones included
+# (the lookahead lets 'cook' match inside 'kauscooks')
+_SHARED_CONTENT_RE = re.compile('(?=(%s))' % '|'.join(
+    re.escape(keyword)
+    for keyword in sorted(_FOOD_KEYWORDS | _INSTAGRAM_ACCOUNTS, key=len, reverse=True)
+))
+
 class ConversationHandler:
     """Handles the conversation flow for the Instagram Recipe Agent."""
     
+    # In-process cache of user states, refreshed on every write
+    STATE_CACHE_SIZE = 10000
+    STATE_CACHE_TTL_SECONDS = 300
+    
+    # Recipe cards already built per post, shared by every user who sends it
+    RECIPE_CACHE_SIZE = 1000
+    RECIPE_CACHE_TTL_SECONDS = 86400
+    
+    # Recipe requests waiting or running at once, and the coroutines serving them
+    RECIPE_QUEUE_SIZE = 200
+    RECIPE_QUEUE_WORKERS = 16
+    
     def __init__(
         self,
         user_state_manager: UserStateManager,
@@ -56,16 +95,47 @@ class ConversationHandler:
         self.recipe_extractor = recipe_extractor
         self.pdf_generator = pdf_generator
         self.delivery_agent = delivery_agent
+        self._state_cache = OrderedDict()
+        self._state_lock = threading.RLock()
+        self._user_locks = weakref.WeakValueDictionary()
+        self._locks_lock = threading.Lock()
+        self._recipe_cache = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._completion_subscribers: List[Callable[[Dict], None]] = []
+        self._state_handlers = {
+            STATE_NEW: self._handle_new,
+            STATE_AWAITING_URL: self._handle_awaiting_url,
+            STATE_AWAITING_EMAIL: self._handle_awaiting_email
+        }
+        # Shared, bounded pool for the blocking stages of recipe processing
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("RECIPE_WORKERS", "4")),
+            thread_name_prefix="recipe"
+        )
+        atexit.register(self._executor.shutdown, wait=False)
+        
+        # Event loop that orchestrates recipe requests in the background
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self._loop.run_forever,
+            name="recipe-loop",
+            daemon=True
+        ).start()
+        
+        # Bounded job queue drained by persistent worker coroutines on the loop
+        self._job_q = asyncio.Queue()
+        self._job_slots = threading.BoundedSemaphore(self.RECIPE_QUEUE_SIZE)
+        self._workers = [
+            asyncio.run_coroutine_threadsafe(self._recipe_worker(), self._loop)
+            for _ in range(self.RECIPE_QUEUE_WORKERS)
+        ]
+        atexit.register(self._stop_workers)
         
     def handle_message(self, user_id: str, message: str) -> str:
         """Handle an incoming message from a user."""
         # Log the raw message for debugging
         logger.info(f"Received message from {user_id}: '{message}'")
         
-        # Get current user state
-        user_state = self.user_state_manager.get_user_state(user_id)
-        current_state = user_state.get("state", STATE_NEW)
-        
         # Check for command keywords regardless of state
         message_lower = message.lower().strip()
         
@@ -73,91 +143,168 @@ class ConversationHandler:
         if message_lower == "help":
             return HELP_MESSAGE
             
-        # Process state-specific logic
-        if current_state == STATE_NEW:
-            # For new users, send welcome message if they don't provide a URL
-            post_info = self._extract_instagram_post_info(message)
-            if post_info:
-                # User provided URL right away
-                self.user_state_manager.update_user_state(user_id, {
+        # Parse a post URL once; most messages are rejected by the substring test
+        post_url = None
+        if 'instagram.com' in message_lower:
+            post_url = self.user_state_manager.parse_instagram_url(message)
+        
+        # Serialise the read-branch-write on this user's state, so two quick
+        # messages cannot both act on the same state
+        with self._lock_for(user_id):
+            # Get current user state
+            user_state = self._get_state(user_id)
+            current_state = user_state.get("state", STATE_NEW)
+            
+            # Process state-specific logic
+            handler = self._state_handlers.get(current_state, self._handle_default)
+            return handler(user_id, user_state, message, message_lower, post_url)
+    
+    def _lock_for(self, user_id: str) -> threading.Lock:
+        """Return the lock for a user, creating it on first use.
+        
+        Locks are held weakly, so a user's lock is dropped once no message
+        from them is being handled.
+        """
+        with self._locks_lock:
+            lock = self._user_locks.get(user_id)
+            if lock is None:
+                lock = threading.Lock()
+                self._user_locks[user_id] = lock
+            return lock
+    
+    def _handle_new(self, user_id: str, user_state: Dict, message: str, message_lower: str, post_url: Optional[str]) -> str:
+        """Handle a message from a new user."""
+        # For new users, send welcome message if they don't provide a URL
+        post_info = post_url or self._extract_instagram_post_info(message, message_lower)
+        if post_info:
+            # User provided URL right away
+            self._update_state(user_id, {
+                "state": STATE_AWAITING_EMAIL,
+                "pending_url": post_info
+            })
+            return EMAIL_REQUEST
+        else:
+            # Update to awaiting URL state
+            self._update_state(user_id, {
+                "state": STATE_AWAITING_URL
+            })
+            return WELCOME_MESSAGE
+    
+    def _handle_awaiting_url(self, user_id: str, user_state: Dict, message: str, message_lower: str, post_url: Optional[str]) -> str:
+        """Handle a message from a user who is expected to send a post URL."""
+        if post_url:
+            # Valid URL provided
+            if user_state.get("email"):
+                # User already has email, start processing
+                return self._process_recipe_request(user_id, post_url, user_state)
+            else:
+                # Need email first
+                self._update_state(user_id, {
                     "state": STATE_AWAITING_EMAIL,
-                    "pending_url": message
+                    "pending_url": post_url
                 })
                 return EMAIL_REQUEST
-            else:
-                # Update to awaiting URL state
-                self.user_state_manager.update_user_state(user_id, {
+        else:
+            # Invalid URL
+            return INVALID_URL
+    
+    def _handle_awaiting_email(self, user_id: str, user_state: Dict, message: str, message_lower: str, post_url: Optional[str]) -> str:
+        """Handle a message from a user who is expected to send an email address."""
+        # Without an '@' there is no email to validate or extract
+        if '@' not in message:
+            return INVALID_EMAIL
+        
+        # First, try with the raw message
+        if self.user_state_manager.is_valid_email(message):
+            email = message
+        else:
+            # Enhanced email extraction
+            extracted_email = self._extract_email_from_message(message)
+            if not extracted_email:
+                # No valid email found
+                return INVALID_EMAIL
+            email = extracted_email
+            logger.info(f"Successfully extracted email: {email}")
+        
+        # Process with the extracted email
+        pending_url = user_state.get("pending_url")
+        
+        # Send confirmation
+        confirmation = EMAIL_CONFIRMATION.format(email=email)
+        
+        if pending_url:
+            # Process asynchronously and return confirmation for now
+            if not self._schedule_recipe_request(user_id, pending_url, email):
+                # Keep the email, but the post has to be sent again later
+                self._update_state(user_id, {
+                    "email": email,
                     "state": STATE_AWAITING_URL
                 })
-                return WELCOME_MESSAGE
-                
-        elif current_state == STATE_AWAITING_URL:
-            # Expecting a URL
-            if self.user_state_manager.is_instagram_post_url(message):
-                # Valid URL provided
-                if user_state.get("email"):
-                    # User already has email, start processing
-                    return self._process_recipe_request(user_id, message)
-                else:
-                    # Need email first
-                    self.user_state_manager.update_user_state(user_id, {
-                        "state": STATE_AWAITING_EMAIL,
-                        "pending_url": message
-                    })
-                    return EMAIL_REQUEST
-            else:
-                # Invalid URL
-                return INVALID_URL
-                
-        elif current_state == STATE_AWAITING_EMAIL:
-            # First, try with the raw message
-            if self.user_state_manager.is_valid_email(message):
-                email = message
-            else:
-                # Enhanced email extraction
-                extracted_email = self._extract_email_from_message(message)
-                if not extracted_email:
-                    # No valid email found
-                    return INVALID_EMAIL
-                email = extracted_email
-                logger.info(f"Successfully extracted email: {email}")
+                return SERVICE_BUSY
             
-            # Process with the extracted email
-            pending_url = user_state.get("pending_url")
-            
-            self.user_state_manager.update_user_state(user_id, {
-                "email": email
+            # Store the email and mark the request as processing in one write
+            self._update_state(user_id, {
+                "email": email,
+                "state": STATE_PROCESSING
             })
-            
-            # Send confirmation
-            confirmation = EMAIL_CONFIRMATION.format(email=email)
-            
-            if pending_url:
-                # Process the pending URL
-                self.user_state_manager.update_user_state(user_id, {
-                    "state": STATE_PROCESSING
-                })
-                
-                # Process asynchronously and return confirmation for now
-                self._process_recipe_request_async(user_id, pending_url)
-                return confirmation
-            else:
-                # No pending URL, await one
-                self.user_state_manager.update_user_state(user_id, {
-                    "state": STATE_AWAITING_URL
-                })
-                return confirmation + "\n\nNow, send me an Instagram recipe post to try it out!"
-        
-        # Default response for any other state or unrecognized input
-        if self.user_state_manager.is_instagram_post_url(message):
-            return self._process_recipe_request(user_id, message)
+            return confirmation
+        else:
+            # Store the email and await a URL in one write
+            self._update_state(user_id, {
+                "email": email,
+                "state": STATE_AWAITING_URL
+            })
+            return confirmation + "\n\nNow, send me an Instagram recipe post to try it out!"
+    
+    def _handle_default(self, user_id: str, user_state: Dict, message: str, message_lower: str, post_url: Optional[str]) -> str:
+        """Handle a message in any other state, such as while a recipe is processing."""
+        if post_url:
+            return self._process_recipe_request(user_id, post_url, user_state)
         else:
             # Update to awaiting URL state if in an unexpected state
-            self.user_state_manager.update_user_state(user_id, {
+            self._update_state(user_id, {
                 "state": STATE_AWAITING_URL
             })
             return INVALID_URL
 
+    def _get_state(self, user_id: str) -> Dict:
+        """Return a user's state, served from the in-process cache when fresh."""
+        with self._state_lock:
+            entry = self._state_cache.get(user_id)
+            if entry is not None:
+                expires_at, state = entry
+                if expires_at >= time.monotonic():
+                    self._state_cache.move_to_end(user_id)
+                    return state
+                del self._state_cache[user_id]
+            
+            # Read and cache under the lock so a concurrent write-and-invalidate
+            # cannot be overwritten by the state read before it
+            state = dict(self.user_state_manager.get_user_state(user_id))
+            self._cache_state(user_id, state)
+            return state
+    
+    def _update_state(self, user_id: str, patch: Dict) -> None:
+        """Write a state change through to the manager and the cache."""
+        with self._state_lock:
+            self.user_state_manager.update_user_state(user_id, patch)
+            entry = self._state_cache.get(user_id)
+            if entry is not None:
+                self._cache_state(user_id, {**entry[1], **patch})
+    
+    def _cache_state(self, user_id: str, state: Dict) -> None:
+        """Cache a user's state, evicting the least recently used users."""
+        with self._state_lock:
+            self._state_cache[user_id] = (time.monotonic() + self.STATE_CACHE_TTL_SECONDS, state)
+            self._state_cache.move_to_end(user_id)
+            while len(self._state_cache) > self.STATE_CACHE_SIZE:
+                self._state_cache.popitem(last=False)
+    
+    def _invalidate_state(self, user_id: str) -> None:
+        """Drop a user's cached state after a write that bypassed the cache."""
+        with self._state_lock:
+            self._state_cache.pop(user_id, None)
+    
     def _extract_email_from_message(self, message: str) -> Optional[str]:
         """
         Advanced email extraction from message text.
@@ -174,203 +321,360 @@ class ConversationHandler:
         # Log the raw message for debugging
         logger.info(f"Extracting email from: '{message}'")
         
-        # Method 1: Use regex to find email patterns
-        email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        email_matches = re.findall(email_pattern, message)
+        # Method 1: Use regex to find email patterns, usually the first match
+        match = _EMAIL_RE.search(message)
+        if match:
+            candidate = match.group(0)
+            if self.user_state_manager.is_valid_email(candidate):
+                logger.info(f"Found email via regex: {candidate}")
+                return candidate
+            
+            # Rare: the first match was rejected, so try the rest
+            for match in _EMAIL_RE.finditer(message, match.end()):
+                candidate = match.group(0)
+                if self.user_state_manager.is_valid_email(candidate):
+                    logger.info(f"Found email via regex: {candidate}")
+                    return candidate
         
-        if email_matches:
-            for match in email_matches:
-                if self.user_state_manager.is_valid_email(match):
-                    logger.info(f"Found email via regex: {match}")
-                    return match
+        # The fallbacks below all hinge on an '@', so skip them without one
+        if '@' not in message:
+            logger.warning(f"No valid email found in message: '{message}'")
+            return None
         
         # Method 2: Clean up text and split into words
-        cleaned_text = message.lower()
         # Remove common UI elements and punctuation
-        ui_elements = ['react', 'reply', 'more', 'enter', 'send', 'close']
-        
-        for element in ui_elements:
-            cleaned_text = cleaned_text.replace(element, ' ')
+        cleaned_text = _UI_WORDS_RE.sub(' ', message)
         
         # Replace non-email punctuation with spaces
-        cleaned_text = re.sub(r'[^\w\s@.-]', ' ', cleaned_text)
+        cleaned_text = _NON_EMAIL_PUNCT_RE.sub(' ', cleaned_text)
         
         # Split into words and examine each
-        words = re.split(r'\s+', cleaned_text)
+        words = _WS_RE.split(cleaned_text)
         
         for word in words:
             # Look for words with @ and . which are common in emails
             if '@' in word and '.' in word:
                 # Further clean the word
-                clean_word = re.sub(r'[^a-zA-Z0-9.@_+-]', '', word)
+                clean_word = _CLEAN_RE.sub('', word)
                 if self.user_state_manager.is_valid_email(clean_word):
                     logger.info(f"Found email via word cleaning: {clean_word}")
                     return clean_word
         
-        # Method 3: Try to extract just the email portion from longer text
-        at_index = message.find('@')
-        
-        if at_index != -1:
-            # Look for a valid email around the @ symbol
-            # Find start (working backwards from @)
-            start_index = at_index
-            while start_index > 0 and re.match(r'[a-zA-Z0-9._%+-]', message[start_index-1]):
-                start_index -= 1
-            
-            # Find end (working forwards from @)
-            end_index = at_index
-            while end_index < len(message)-1 and re.match(r'[a-zA-Z0-9.-]', message[end_index+1]):
-                end_index += 1
-            
-            # Find the domain end (looking for the '.' and valid TLD)
-            while end_index < len(message)-1:
-                if message[end_index] == '.':
-                    # Found a dot, check for valid TLD length (2-6 chars)
-                    potential_end = end_index + 1
-                    while potential_end < len(message) and re.match(r'[a-zA-Z]', message[potential_end]):
-                        potential_end += 1
-                    
-                    # If we found a valid TLD length, use this as our end
-                    if 2 <= potential_end - (end_index + 1) <= 6:
-                        end_index = potential_end
-                        break
-                
-                end_index += 1
-                if end_index >= len(message) or not re.match(r'[a-zA-Z0-9.-]', message[end_index]):
-                    break
-            
-            # Extract the potential email and validate
-            if start_index < at_index and end_index > at_index:
-                potential_email = message[start_index:end_index]
-                if self.user_state_manager.is_valid_email(potential_email):
-                    logger.info(f"Found email via @ parsing: {potential_email}")
-                    return potential_email
+        # Method 3: Try to extract just the email portion from longer text,
+        # ending each candidate at a word boundary after its TLD
+        for match in _EMAIL_LOOSE_RE.finditer(message):
+            potential_email = match.group(0)
+            if self.user_state_manager.is_valid_email(potential_email):
+                logger.info(f"Found email via @ parsing: {potential_email}")
+                return potential_email
         
         # No valid email found with any method
         logger.warning(f"No valid email found in message: '{message}'")
         return None
     
-    def _process_recipe_request(self, user_id: str, post_url: str) -> str:
+    def _process_recipe_request(self, user_id: str, post_url: str, user_state: Optional[Dict] = None) -> str:
         """Process a recipe request for a user.
         
         Args:
             user_id: Unique identifier for the user
             post_url: Instagram post URL
+            user_state: Already loaded state for the user, if any
             
         Returns:
             Response message to send to the user
         """
-        user_state = self.user_state_manager.get_user_state(user_id)
+        if user_state is None:
+            user_state = self._get_state(user_id)
         email = user_state.get("email")
         
         if not email:
             # Need email first
-            self.user_state_manager.update_user_state(user_id, {
+            self._update_state(user_id, {
                 "state": STATE_AWAITING_EMAIL,
                 "pending_url": post_url
             })
             return EMAIL_REQUEST
             
-        # User has email, update state and start processing
-        self.user_state_manager.update_user_state(user_id, {
-            "state": STATE_PROCESSING
-        })
-        
-        # Process the recipe request asynchronously
-        # In a real implementation, this would be truly asynchronous
+        # User has email, start processing and inform user it's in progress.
+        # The state is written once, after the queue has accepted the request
         try:
-            # Start process and inform user it's in progress
             logger.info(f"Starting recipe processing for user {user_id}, post {post_url}")
-            threading.Thread(target=self._process_recipe_request_async, args=(user_id, post_url)).start()
+            if not self._schedule_recipe_request(user_id, post_url, email):
+                return SERVICE_BUSY
+            self._update_state(user_id, {
+                "state": STATE_PROCESSING
+            })
             return RETURNING_USER.format(email=email)
         except Exception as e:
             logger.error(f"Error starting recipe processing: {str(e)}")
             return PROCESSING_ERROR
     
-    def _process_recipe_request_async(self, user_id: str, post_url: str) -> None:
+    def _schedule_recipe_request(self, user_id: str, post_url: str, email: str) -> bool:
+        """Queue a recipe request for the background workers.
+        
+        The email travels with the job: the caller writes it to state only
+        after the queue accepts, so a fast job must not look it up there.
+        
+        Args:
+            user_id: Unique identifier for the user
+            post_url: Instagram post URL
+            email: Address to deliver the recipe card to
+            
+        Returns:
+            False if the queue is full and the request was not accepted
+        """
+        if not self._job_slots.acquire(blocking=False):
+            logger.warning(f"Recipe queue full, turning away {post_url} for user {user_id}")
+            return False
+        self._loop.call_soon_threadsafe(self._job_q.put_nowait, (user_id, post_url, email))
+        return True
+    
+    def _stop_workers(self) -> None:
+        """Cancel the worker coroutines so they do not outlive the interpreter."""
+        for worker in self._workers:
+            worker.cancel()
+    
+    async def _recipe_worker(self) -> None:
+        """Process queued recipe requests one at a time, forever."""
+        while True:
+            user_id, post_url, email = await self._job_q.get()
+            try:
+                await self._process_recipe_request_async(user_id, post_url, email)
+            finally:
+                self._job_q.task_done()
+                self._job_slots.release()
+    
+    async def _run_blocking(self, func, *args):
+        """Run a blocking agent call on the shared thread pool."""
+        return await self._loop.run_in_executor(self._executor, func, *args)
+    
+    async def _process_recipe_request_async(self, user_id: str, post_url: str, email: str) -> None:
         """Process a recipe request asynchronously.
         
+        The blocking agent calls run on the shared thread pool, so the event
+        loop can orchestrate many requests at once. The post is recorded as
+        processed only after its email has been sent.
+        
         Args:
             user_id: Unique identifier for the user
             post_url: Instagram post URL
+            email: Address to deliver the recipe card to
         """
-        # This would be a background task in a real implementation
         try:
-            # Extract post content
-            post_content = self.instagram_monitor.extract_post_content(post_url)
-            if not post_content or not post_content.get("caption"):
-                logger.error(f"Failed to extract content from {post_url}")
-                # Would need to notify user about the failure in a real implementation
-                return
-                
-            # Extract recipe
-            recipe_data = self.recipe_extractor.extract_recipe(post_content["caption"])
-            if not recipe_data:
-                logger.error(f"Failed to extract recipe from {post_url}")
-                # Would need to notify user about the failure in a real implementation
-                return
-                
-            # Add source information to recipe data
-            if 'source' not in recipe_data:
-                recipe_data['source'] = {
-                    'platform': 'Instagram',
-                    'url': post_url,
-                    'extraction_date': time.strftime('%Y-%m-%d %H:%M:%S')
-                }
-                
-            # Generate PDF
-            pdf_path = self.pdf_generator.generate_pdf(recipe_data)
-            if not pdf_path:
-                logger.error(f"Failed to generate PDF for {post_url}")
-                # Would need to notify user about the failure in a real implementation
-                return
-                
-            # Send email
-            user_state = self.user_state_manager.get_user_state(user_id)
-            email = user_state.get("email")
-            if email:
-                self.delivery_agent.send_recipe_email(
-                    email, 
-                    recipe_data.get("title", "Recipe"),
-                    pdf_path
-                )
+            # A post this user already received only needs its card re-sent
+            processed = self.user_state_manager.get_processed_post(user_id, post_url)
+            if processed and processed.get("pdf_path") and os.path.exists(processed["pdf_path"]):
+                logger.info(f"Re-sending recipe card for {post_url} to user {user_id}")
+                title, pdf_path = processed["title"], processed["pdf_path"]
+            else:
+                processed = None
+                recipe = await self._get_or_build_recipe(post_url)
+                if not recipe:
+                    self._publish_completion({
+                        "user_id": user_id,
+                        "post_url": post_url,
+                        "status": "failed",
+                        "message": EXTRACTION_ERROR
+                    })
+                    return
                 
-            # Update user state
-            self.user_state_manager.add_processed_post(
-                user_id, 
-                post_url, 
-                recipe_data.get("title", "Recipe")
+                recipe_data, pdf_path = recipe
+                title = recipe_data.get("title", "Recipe")
+            
+            # Record the post only once the card has actually been sent
+            delivered = await self._run_blocking(self._deliver_recipe, email, title, pdf_path)
+            await self._run_blocking(
+                self._record_processed_post, user_id, post_url, title, pdf_path, processed is None and delivered
             )
-            self.user_state_manager.update_user_state(user_id, {
-                "state": STATE_AWAITING_URL
-            })
             
-            # In a real implementation, would notify user of completion
+            if not delivered:
+                self._publish_completion({
+                    "user_id": user_id,
+                    "post_url": post_url,
+                    "status": "failed",
+                    "recipe_title": title,
+                    "pdf_path": pdf_path,
+                    "message": DELIVERY_ERROR
+                })
+                return
             
+            self._publish_completion({
+                "user_id": user_id,
+                "post_url": post_url,
+                "status": "complete",
+                "recipe_title": title,
+                "pdf_path": pdf_path,
+                "message": PROCESSING_COMPLETE.format(recipe_title=title)
+            })
+            
+        except Exception:
+            logger.exception(f"Error processing recipe request for {post_url}")
+            self._publish_completion({
+                "user_id": user_id,
+                "post_url": post_url,
+                "status": "failed",
+                "message": PROCESSING_ERROR
+            })
+    
+    def subscribe_completions(self, callback: Callable[[Dict], None]) -> None:
+        """Register a callback for finished recipe requests.
+        
+        Each event is a dict with user_id, post_url, status ("complete" or
+        "failed") and a ready-to-send message, plus recipe_title and pdf_path
+        whenever a card was generated. Callbacks run on the shared thread
+        pool, so a slow subscriber (such as a DM sender) does not hold up
+        other requests.
+        
+        Args:
+            callback: Function called with each completion event
+        """
+        self._completion_subscribers.append(callback)
+    
+    def _publish_completion(self, event: Dict) -> None:
+        """Push a completion event to every subscriber."""
+        logger.info(f"Recipe request for {event['user_id']} {event['status']}: {event['post_url']}")
+        for callback in self._completion_subscribers:
+            self._loop.run_in_executor(
+                self._executor, self._notify_subscriber, callback, event
+            )
+    
+    def _notify_subscriber(self, callback: Callable[[Dict], None], event: Dict) -> None:
+        """Deliver one event, keeping a failing subscriber from affecting others."""
+        try:
+            callback(event)
         except Exception as e:
-            logger.error(f"Error processing recipe request: {str(e)}")
-            logger.error(traceback.format_exc())
-            # Would need to notify user about the failure in a real implementation
-
-    def _extract_instagram_post_info(self, message: str) -> Optional[str]:
-        """Extract Instagram post information from a message."""
-        # Check if message is directly a URL
-        if message.startswith('http') and ('instagram.com' in message):
-            return message
+            logger.error(f"Error in completion subscriber: {str(e)}")
+    
+    async def _get_or_build_recipe(self, post_url: str) -> Optional[Tuple[Dict, str]]:
+        """Return the recipe and PDF for a post, reusing a recent build when possible.
         
-        # Check for shared content - look for account names and food-related terms
-        food_keywords = ['recipe', 'cook', 'food', 'meal', 'dish', 'bake', 'ingredient']
-        instagram_accounts = ['kauscooks', 'hungry.happens', 'recipe', 'food']
+        Args:
+            post_url: Canonical Instagram post URL
+            
+        Returns:
+            Tuple of (recipe_data, pdf_path), or None if any stage failed
+        """
+        # The cache and in-flight map are only touched from the event loop
+        # thread, so no lock is needed
+        entry = self._recipe_cache.get(post_url)
+        if entry is not None:
+            expires_at, recipe = entry
+            if expires_at >= time.monotonic() and os.path.exists(recipe[1]):
+                self._recipe_cache.move_to_end(post_url)
+                logger.info(f"Reusing recipe card for {post_url}")
+                return recipe
+            del self._recipe_cache[post_url]
+        
+        # Join a build already running for this post instead of starting another
+        task = self._inflight.get(post_url)
+        if task is None:
+            task = self._loop.create_task(self._build_recipe(post_url))
+            self._inflight[post_url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(post_url, None))
+        else:
+            logger.info(f"Waiting on in-flight recipe build for {post_url}")
+        return await asyncio.shield(task)
+    
+    async def _build_recipe(self, post_url: str) -> Optional[Tuple[Dict, str]]:
+        """Scrape a post, extract its recipe and render the PDF, caching the result.
+        
+        Args:
+            post_url: Canonical Instagram post URL
+            
+        Returns:
+            Tuple of (recipe_data, pdf_path), or None if any stage failed
+        """
+        # Extract post content
+        post_content = await self._run_blocking(self.instagram_monitor.extract_post_content, post_url)
+        if not post_content or not post_content.get("caption"):
+            logger.error(f"Failed to extract content from {post_url}")
+            return None
+            
+        # Extract recipe
+        recipe_data = await self._run_blocking(self.recipe_extractor.extract_recipe, post_content["caption"])
+        if not recipe_data:
+            logger.error(f"Failed to extract recipe from {post_url}")
+            return None
+            
+        # Add source information to recipe data
+        if 'source' not in recipe_data:
+            recipe_data['source'] = {
+                'platform': 'Instagram',
+                'url': post_url,
+                'extraction_date': datetime.now(timezone.utc).isoformat(timespec='seconds')
+            }
+            
+        # Generate PDF
+        pdf_path = await self._run_blocking(self.pdf_generator.generate_pdf, recipe_data)
+        if not pdf_path:
+            logger.error(f"Failed to generate PDF for {post_url}")
+            return None
+        
+        recipe = (recipe_data, pdf_path)
+        self._recipe_cache[post_url] = (time.monotonic() + self.RECIPE_CACHE_TTL_SECONDS, recipe)
+        while len(self._recipe_cache) > self.RECIPE_CACHE_SIZE:
+            self._recipe_cache.popitem(last=False)
+        return recipe
+    
+    def _deliver_recipe(self, email: str, title: str, pdf_path: str) -> bool:
+        """Email a generated recipe card to the user.
         
-        # Check if message mentions food and has an Instagram account name
-        has_food = any(keyword in message.lower() for keyword in food_keywords)
-        has_account = any(account in message.lower() for account in instagram_accounts)
+        Returns:
+            True if the email was sent
+        """
+        if not email:
+            logger.error(f"No email to deliver recipe card '{title}' to")
+            return False
+        return self.delivery_agent.send_recipe_email(email, title, pdf_path)
+    
+    def _record_processed_post(self, user_id: str, post_url: str, title: str, pdf_path: str, is_new: bool = True) -> None:
+        """Return the user to awaiting a URL, recording the post when is_new.
         
-        if has_account and has_food:
-            return message
+        Callers pass is_new=False for re-sent posts and for failed deliveries,
+        so only the state changes.
+        """
+        # Wait for the handler that queued this request to finish its own
+        # state write, so this transition always lands last
+        with self._lock_for(user_id):
+            if not is_new:
+                # Already recorded, or not delivered; only the state changes
+                self._update_state(user_id, {
+                    "state": STATE_AWAITING_URL
+                })
+                return
+            
+            # Same lock as _update_state: the manager rewrites the whole state file
+            with self._state_lock:
+                self.user_state_manager.add_processed_post(
+                    user_id,
+                    post_url,
+                    title,
+                    {"state": STATE_AWAITING_URL},
+                    pdf_path=pdf_path
+                )
+                self._invalidate_state(user_id)
+
+    def _extract_instagram_post_info(self, message: str, message_lower: str) -> Optional[str]:
+        """Recognise shared recipe content in a message that is not a post URL.
         
-        # Check for clear Instagram sharing indicators
-        if '@' in message and any(term in message.lower() for term in ['recipe', 'cook', 'food']):
-            return message
+        Args:
+            message: Raw message text
+            message_lower: The message already lowercased by handle_message
+            
+        Returns:
+            The message if it looks like shared recipe content, otherwise None
+        """
+        # Check for shared content - look for account names and food-related terms
+        has_at = '@' in message
+        has_food = has_account = has_share = False
+        for match in _SHARED_CONTENT_RE.finditer(message_lower):
+            keyword = match.group(1)
+            has_food = has_food or keyword in _FOOD_KEYWORDS
+            has_account = has_account or keyword in _INSTAGRAM_ACCOUNTS
+            has_share = has_share or keyword in _SHARE_KEYWORDS
+            
+            # Food plus an Instagram account name, or a clear sharing indicator
+            if (has_food and has_account) or (has_at and has_share):
+                return message
         
         return None
\ No newline at end of file
@@ -1,19 +1,50 @@
-import os
 import re
 import logging
-import time
-from typing import Dict, List, Optional, Any, Callable
+from functools import lru_cache
+from typing import Dict, Optional, Any, Callable
 
 from src.utils.user_state_enhanced import UserStateManager
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
+logger = logging.getLogger(__name__)
+
+# URL and recipe-indicator patterns, compiled once at import
+_URL_RE = re.compile(r'https?://(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&//=]*)')
+_IG_URL_RE = re.compile(r'https?://(?:www\.)?instagram\.com/(?:p|reel|tv)/[A-Za-z0-9_-]+')
+_RECIPE_RE = re.compile(
+    r'\d+\s*(?:cup|cups|tbsp|tsp|tablespoon|teaspoon|oz|ounce|pound|lb|kg|g|gram|ml|liter|l)\b'  # Measurements
+    r'|ingredient[s]?'  # Ingredient mention
+    r'|instruction[s]?'  # Instruction mention
+    r'|step\s+\d+'  # Step references
+    r'|(?:pre-?heat|bake|cook|simmer|boil|fry|saute|roast|grill|mix|stir|blend|whisk)\b'  # Cooking verbs
+    r'|(?:oven|stove|pan|pot|bowl|mixer|blender)\b',  # Cooking tools
+    re.IGNORECASE
 )
 
-logger = logging.getLogger(__name__)
+# Commands that override the normal conversation flow
+_HELP_CMDS = frozenset({"help", "/help"})
+_EXAMPLES_CMDS = frozenset({"examples", "/examples"})
+_RESET_CMDS = frozenset({"reset", "/reset"})
+
+# Greetings: exact replies hit the set, longer messages fall through to the regex
+_GREETING_EXACT = frozenset({"hello", "hi", "hey", "howdy", "hola", "good morning", "good afternoon", "good evening", "👋"})
+_GREETING_RE = re.compile(r'\b(?:hello|hi|hey|howdy|hola|good (?:morning|afternoon|evening))\b|👋')
+
+
+@lru_cache(maxsize=2048)
+def _find_url(content: str) -> Optional[str]:
+    """Return the first Instagram post URL in a message, else its first URL.
+    
+    Cached because users often send the same link twice in a row.
+    """
+    # Return first Instagram post URL if found
+    match = _IG_URL_RE.search(content)
+    if match:
+        return match.group(0)
+    
+    # If no Instagram post URL, return any URL
+    match = _URL_RE.search(content)
+    return match.group(0) if match else None
+
 
 class ConversationHandler:
     """
@@ -85,6 +116,9 @@ class ConversationHandler:
                         
             "error": "I'm having some trouble processing that. Could you try again or send a different recipe post?"
         }
+        
+        # Bound formatters for the templates that take placeholders
+        self._fmt = {name: template.format_map for name, template in self.templates.items() if "{" in template}
     
     def process_message(self, sender: str, content: str) -> Optional[str]:
         """
@@ -104,13 +138,14 @@ class ConversationHandler:
         current_state = user_state.get("state", "initial")
         
         # Check for commands that override normal flow
-        if content.lower().strip() in ["help", "/help"]:
+        command = content.lower().strip()
+        if command in _HELP_CMDS:
             return self.templates["help"]
             
-        if content.lower().strip() in ["examples", "/examples"]:
+        if command in _EXAMPLES_CMDS:
             return self.templates["examples"]
             
-        if content.lower().strip() in ["reset", "/reset"]:
+        if command in _RESET_CMDS:
             self.user_state_manager.update_user_state(sender, {"state": "initial"})
             return "I've reset our conversation. What would you like to do now?"
         
@@ -148,6 +183,10 @@ class ConversationHandler:
     
     def _handle_awaiting_email_state(self, sender: str, content: str, user_state: Dict[str, Any]) -> str:
         """Handle messages when awaiting email address."""
+        # No '@' means no email, so skip the extraction passes entirely
+        if "@" not in content:
+            return self.templates["invalid_email"]
+        
         # Try to extract email
         email = self.user_state_manager.extract_email_from_text(content)
         
@@ -160,7 +199,7 @@ class ConversationHandler:
             })
             
             # Return processing message
-            return self.templates["processing"].format(email=email)
+            return self._fmt["processing"]({"email": email})
         else:
             # Invalid or no email found
             return self.templates["invalid_email"]
@@ -174,7 +213,7 @@ class ConversationHandler:
         })
         
         # Return completion message
-        return self.templates["completion"].format(title="Delicious Recipe")
+        return self._fmt["completion"]({"title": "Delicious Recipe"})
     
     def _handle_completed_state(self, sender: str, content: str, user_state: Dict[str, Any]) -> str:
         """Handle messages after recipe processing completed."""
@@ -208,54 +247,26 @@ class ConversationHandler:
     
     def _is_greeting(self, content: str) -> bool:
         """Check if message is a greeting."""
-        greetings = ["hello", "hi", "hey", "howdy", "hola", "good morning", "good afternoon", "good evening", "👋"]
-        return any(greeting in content.lower() for greeting in greetings)
+        lowered = content.lower().strip()
+        if lowered in _GREETING_EXACT:
+            return True
+        return _GREETING_RE.search(lowered) is not None
     
     def _extract_url(self, content: str) -> Optional[str]:
         """Extract URL from message content."""
-        # Simple regex pattern for URLs
-        url_pattern = r'https?://(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&//=]*)'
-        
-        # Find all URLs
-        urls = re.findall(url_pattern, content)
-        
-        # Filter for Instagram URLs
-        instagram_urls = [url for url in urls if "instagram.com" in url]
+        # Both patterns need a scheme, so most chat messages skip the regex engine
+        if "http" not in content:
+            return None
         
-        # Return first Instagram URL if found
-        if instagram_urls:
-            return instagram_urls[0]
-            
-        # If no Instagram URL, return any URL
-        if urls:
-            return urls[0]
-            
-        return None
+        return _find_url(content)
     
     def _looks_like_recipe(self, content: str) -> bool:
         """Check if content might be a recipe."""
-        # Look for recipe indicators
-        recipe_indicators = [
-            r'\d+\s*(?:cup|cups|tbsp|tsp|tablespoon|teaspoon|oz|ounce|pound|lb|kg|g|gram|ml|liter|l)\b',  # Measurements
-            r'ingredient[s]?',  # Ingredient mention
-            r'instruction[s]?',  # Instruction mention
-            r'step\s+\d+',  # Step references
-            r'(?:pre-?heat|bake|cook|simmer|boil|fry|saute|roast|grill|mix|stir|blend|whisk)\b',  # Cooking verbs
-            r'(?:oven|stove|pan|pot|bowl|mixer|blender)\b'  # Cooking tools
-        ]
-        
-        # Check if content has multiple lines
+        # Consider it a recipe if it is either long or has multiple lines...
+        # (29 spaces stand in for 30 words without building a word list)
         has_multiple_lines = content.count('\n') >= 3
+        if not has_multiple_lines and content.count(' ') < 29:
+            return False
         
-        # Check if content is long enough
-        is_long_enough = len(content.split()) >= 30
-        
-        # Check for recipe indicators
-        has_indicators = False
-        for pattern in recipe_indicators:
-            if re.search(pattern, content, re.IGNORECASE):
-                has_indicators = True
-                break
-        
-        # Consider it a recipe if it has indicators and is either long or has multiple lines
-        return has_indicators and (is_long_enough or has_multiple_lines)
+        # ...and has recipe indicators
+        return _RECIPE_RE.search(content) is not None
@@ -1,19 +1,147 @@
 # src/utils/db.py
 import os
-import sqlite3
 import json
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 from datetime import datetime
 
+try:
+    # Bundles a current SQLite; the stdlib module links whatever the OS ships,
+    # and the RETURNING clauses below need SQLite 3.35+
+    from pysqlite3 import dbapi2 as sqlite3
+except ImportError:
+    import sqlite3
+
+try:
+    # Native JSON codec; recipe payloads are stored as the UTF-8 bytes it emits
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
 logger = logging.getLogger(__name__)
 
-# Global database connection
-_db_connection = None
+# Database file, resolved by init_db. Each thread opens its own connection
+# to it so WAL readers never queue behind one shared connection's mutex.
+_db_path = None
+_local = threading.local()
+_db_manager = None
+
+# Applied on every new connection. WAL lets readers run alongside the writer,
+# and synchronous=NORMAL is safe under WAL while skipping the per-commit fsync.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA foreign_keys=ON",
+)
+
+# SQL used by DatabaseManager. Passing the same string objects on every call
+# keeps the statements hot in the connection's prepared-statement cache.
+_SQL_UPSERT_USER = """
+INSERT INTO users (email, created_at, preferences) VALUES (?1, ?2, ?3)
+ON CONFLICT (email) DO UPDATE SET preferences = ?4 WHERE ?4 IS NOT NULL
+RETURNING id
+"""
+_SQL_GET_USER_ID = "SELECT id FROM users WHERE email = ?"
+_SQL_INSERT_SUBSCRIPTION = "INSERT OR IGNORE INTO user_account_subscriptions (user_id, account_id, subscribed_at) VALUES (?, ?, ?)"
+# DO NOTHING writes nothing for an existing account, so RETURNING yields no row
+_SQL_INSERT_ACCOUNT = """
+INSERT INTO monitored_accounts (instagram_username, added_at) VALUES (?, ?)
+ON CONFLICT (instagram_username) DO NOTHING
+RETURNING id
+"""
+_SQL_GET_ACCOUNT_ID = "SELECT id FROM monitored_accounts WHERE instagram_username = ?"
+_SQL_UPDATE_ACCOUNT_CHECKED = "UPDATE monitored_accounts SET last_checked = ? WHERE id = ?"
+_SQL_UPSERT_RECIPE = """
+INSERT INTO processed_recipes (post_url, title, json_data, processed_at, pdf_path)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (post_url) DO UPDATE SET
+    title = excluded.title,
+    json_data = excluded.json_data,
+    processed_at = excluded.processed_at,
+    pdf_path = excluded.pdf_path
+"""
+_SQL_UPSERT_RECIPE_RETURNING = _SQL_UPSERT_RECIPE + "RETURNING id"
+_SQL_INSERT_DELIVERY = "INSERT OR IGNORE INTO delivered_recipes (user_id, recipe_id, delivered_at) VALUES (?, ?, ?)"
+_SQL_GET_USER_BY_EMAIL = "SELECT id, email, created_at, preferences FROM users WHERE email = ?"
+_SQL_GET_USER_BY_ID = "SELECT id, email, created_at, preferences FROM users WHERE id = ?"
+_SQL_GET_MONITORED_ACCOUNTS = "SELECT id, instagram_username, added_at, last_checked FROM monitored_accounts"
+_SQL_GET_USER_SUBSCRIPTIONS = """
+SELECT a.id, a.instagram_username, s.subscribed_at
+FROM user_account_subscriptions s
+JOIN monitored_accounts a ON a.id = s.account_id
+WHERE s.user_id = ?
+"""
+_SQL_GET_RECIPE_BY_ID = "SELECT id, post_url, title, json_data, processed_at, pdf_path FROM processed_recipes WHERE id = ?"
+_SQL_GET_RECIPE_BY_URL = "SELECT id, post_url, title, json_data, processed_at, pdf_path FROM processed_recipes WHERE post_url = ?"
+_SQL_GET_USER_DELIVERED_RECIPES = """
+SELECT r.id, r.post_url, r.title, r.processed_at, r.pdf_path, d.delivered_at
+FROM processed_recipes r
+JOIN delivered_recipes d ON r.id = d.recipe_id
+WHERE d.user_id = ?
+ORDER BY d.delivered_at DESC
+"""
+_SQL_UPDATE_USER_PREFERENCES = "UPDATE users SET preferences = ? WHERE id = ?"
+
+# Column names for the plain tuple rows above, in SELECT order.
+# dict(zip(...)) runs in C and skips sqlite3.Row's per-row description lookups.
+_USER_COLUMNS = ('id', 'email', 'created_at', 'preferences')
+_ACCOUNT_COLUMNS = ('id', 'instagram_username', 'added_at', 'last_checked')
+_SUBSCRIPTION_COLUMNS = ('id', 'instagram_username', 'subscribed_at')
+_RECIPE_COLUMNS = ('id', 'post_url', 'title', 'json_data', 'processed_at', 'pdf_path')
+_DELIVERED_RECIPE_COLUMNS = ('id', 'post_url', 'title', 'processed_at', 'pdf_path', 'delivered_at')
+
+# Secondary indexes by name. SQLite does not index foreign-key child columns
+# on its own; the (user_id, ...) lookups are served by the composite keys.
+# DatabaseManager.bulk_load drops and rebuilds these around large inserts.
+_INDEXES = (
+    ("idx_uas_account", "user_account_subscriptions (account_id)"),
+    ("idx_delivered_recipe", "delivered_recipes (recipe_id)"),
+    # Covers get_user_subscriptions, which then only visits
+    # monitored_accounts for the username
+    ("idx_uas_user_covering", "user_account_subscriptions (user_id, account_id, subscribed_at)"),
+    # Walked in order by get_user_delivered_recipes; the trailing recipe_id
+    # makes it covering for the join, so no temp sort or row lookups
+    ("idx_delivered_user_time", "delivered_recipes (user_id, delivered_at DESC, recipe_id)"),
+)
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """Open a connection with the shared PRAGMAs applied"""
+    connection = sqlite3.connect(db_path, cached_statements=256)
+    for pragma in _PRAGMAS:
+        connection.execute(pragma)
+    return connection
+
+def _get_connection() -> sqlite3.Connection:
+    """Get this thread's connection, opening it on first use"""
+    if getattr(_local, "db_path", None) != _db_path:
+        _local.connection = _connect(_db_path)
+        _local.db_path = _db_path
+    return _local.connection
+
+def _create_indexes(connection: sqlite3.Connection):
+    """Create any missing secondary indexes"""
+    for name, target in _INDEXES:
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
 
 def init_db():
     """Initialize the database"""
-    global _db_connection
+    global _db_path, _db_manager
     
     db_path = os.getenv("DATABASE_URL", "sqlite:///./recipe_agent.db")
     
@@ -28,11 +156,12 @@ def init_db():
     
     # Connect to database
     try:
-        _db_connection = sqlite3.connect(db_path, check_same_thread=False)
-        _db_connection.row_factory = sqlite3.Row
+        _db_path = db_path
+        _db_manager = None
+        connection = _get_connection()
         
         # Create tables if they don't exist
-        cursor = _db_connection.cursor()
+        cursor = connection.cursor()
         
         # Users table
         cursor.execute('''
@@ -72,7 +201,7 @@ def init_db():
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             post_url TEXT UNIQUE NOT NULL,
             title TEXT NOT NULL,
-            json_data TEXT NOT NULL,
+            json_data BLOB NOT NULL,
             processed_at TEXT NOT NULL,
             pdf_path TEXT
         )
@@ -87,96 +216,101 @@ def init_db():
             delivered_at TEXT NOT NULL,
             FOREIGN KEY (user_id) REFERENCES users (id),
             FOREIGN KEY (recipe_id) REFERENCES processed_recipes (id),
-            PRIMARY KEY (user_id, recipe_id)
+            UNIQUE (user_id, recipe_id)
         )
         ''')
         
-        _db_connection.commit()
+        # Secondary indexes come last so seed data can be loaded before them
+        _create_indexes(connection)
+        
+        connection.commit()
         logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Error initializing database: {str(e)}")
+    except Exception:
+        logger.exception("Error initializing database")
         raise
 
 def get_db():
-    """Get the database connection"""
-    global _db_connection
+    """Get the shared database manager"""
+    global _db_manager
     
-    if _db_connection is None:
+    if _db_path is None:
         init_db()
     
-    return DatabaseManager(_db_connection)
+    # One shared manager so its read caches survive between calls
+    if _db_manager is None:
+        _db_manager = DatabaseManager()
+    
+    return _db_manager
 
 class DatabaseManager:
     """Database manager class for recipe agent"""
     
-    def __init__(self, connection):
-        self.conn = connection
+    # Read-through caches for lookups the monitor loop repeats every cycle
+    USER_CACHE_SIZE = 256
+    RECIPE_CACHE_SIZE = 256
+    CACHE_TTL_SECONDS = 300
+    ACCOUNTS_CACHE_TTL_SECONDS = 60
+    
+    def __init__(self, connection: Optional[sqlite3.Connection] = None):
+        # Without an explicit connection, each thread uses its own
+        self._connection = connection
+        
+        # OrderedDict LRUs of key -> (expires_at, row), keyed by ('id', ...)
+        # and ('email', ...) / ('url', ...) so both lookups share one entry
+        self._user_cache = OrderedDict()
+        self._recipe_cache = OrderedDict()
+        self._accounts_cache = None
+        self._cache_lock = threading.Lock()
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The connection for the calling thread"""
+        return self._connection or _get_connection()
     
     def add_user(self, email: str, instagram_account: Optional[str] = None, preferences: Dict = None) -> int:
-        """Add a new user and optionally subscribe to an Instagram account"""
+        """Add a new user, or update an existing one, and optionally subscribe to an Instagram account"""
         try:
             cursor = self.conn.cursor()
+            changes_before = self.conn.total_changes
+            now = datetime.now().isoformat()
             
-            # Add user
+            # Add user, or refresh preferences for an existing one when provided
             cursor.execute(
-                "INSERT INTO users (email, created_at, preferences) VALUES (?, ?, ?)",
-                (email, datetime.now().isoformat(), json.dumps(preferences or {}))
+                _SQL_UPSERT_USER,
+                (
+                    email,
+                    now,
+                    json.dumps(preferences or {}),
+                    json.dumps(preferences) if preferences else None,
+                )
             )
             
-            user_id = cursor.lastrowid
+            # No row comes back for an existing user when there is nothing to update
+            result = cursor.fetchone()
+            if result is None:
+                cursor.execute(_SQL_GET_USER_ID, (email,))
+                result = cursor.fetchone()
+            
+            user_id = result[0]
             
-            # Add monitored Instagram account if provided
+            # Add subscription if instagram account provided
             if instagram_account:
                 account_id = self.add_monitored_account(instagram_account)
                 
-                # Create subscription
-                cursor.execute(
-                    "INSERT INTO user_account_subscriptions (user_id, account_id, subscribed_at) VALUES (?, ?, ?)",
-                    (user_id, account_id, datetime.now().isoformat())
-                )
+                # The (user_id, account_id) primary key skips existing subscriptions
+                cursor.execute(_SQL_INSERT_SUBSCRIPTION, (user_id, account_id, now))
+            
+            # Skip the commit when nothing was written (existing user, no updates)
+            if self.conn.total_changes == changes_before:
+                self.conn.rollback()
+                return user_id
             
             self.conn.commit()
-            logger.info(f"Added user with email: {email}")
+            self._invalidate(self._user_cache, (('id', user_id), ('email', email)))
+            logger.info("Added/updated user with email: %s", email)
             return user_id
-        except sqlite3.IntegrityError:
-            # User already exists, find and return their ID
-            cursor.execute("SELECT id FROM users WHERE email = ?", (email,))
-            result = cursor.fetchone()
-            
-            if result:
-                user_id = result[0]
-                
-                # Update preferences if provided
-                if preferences:
-                    cursor.execute(
-                        "UPDATE users SET preferences = ? WHERE id = ?",
-                        (json.dumps(preferences), user_id)
-                    )
-                
-                # Add subscription if instagram account provided
-                if instagram_account:
-                    account_id = self.add_monitored_account(instagram_account)
-                    
-                    # Check if subscription already exists
-                    cursor.execute(
-                        "SELECT 1 FROM user_account_subscriptions WHERE user_id = ? AND account_id = ?",
-                        (user_id, account_id)
-                    )
-                    
-                    if not cursor.fetchone():
-                        cursor.execute(
-                            "INSERT INTO user_account_subscriptions (user_id, account_id, subscribed_at) VALUES (?, ?, ?)",
-                            (user_id, account_id, datetime.now().isoformat())
-                        )
-                
-                self.conn.commit()
-                logger.info(f"Updated existing user with email: {email}")
-                return user_id
-            else:
-                logger.error(f"Error finding user with email: {email}")
-                return -1
-        except Exception as e:
-            logger.error(f"Error adding user: {str(e)}")
+        except Exception:
+            logger.exception("Error adding user")
             self.conn.rollback()
             return -1
     
@@ -185,30 +319,28 @@ class DatabaseManager:
         try:
             cursor = self.conn.cursor()
             
-            # Check if account already exists
-            cursor.execute(
-                "SELECT id FROM monitored_accounts WHERE instagram_username = ?",
-                (instagram_username,)
-            )
+            # When called from add_user, leave committing to the caller
+            owns_transaction = not self.conn.in_transaction
             
+            cursor.execute(_SQL_INSERT_ACCOUNT, (instagram_username, datetime.now().isoformat()))
             result = cursor.fetchone()
             
-            if result:
-                return result[0]
+            if result is None:
+                # Already monitored: nothing was written
+                cursor.execute(_SQL_GET_ACCOUNT_ID, (instagram_username,))
+                account_id = cursor.fetchone()[0]
+                if owns_transaction:
+                    self.conn.rollback()
+                return account_id
             
-            # Add new account
-            cursor.execute(
-                "INSERT INTO monitored_accounts (instagram_username, added_at) VALUES (?, ?)",
-                (instagram_username, datetime.now().isoformat())
-            )
-            
-            account_id = cursor.lastrowid
-            self.conn.commit()
+            if owns_transaction:
+                self.conn.commit()
+            self._accounts_cache = None
             
-            logger.info(f"Added monitored account: {instagram_username}")
-            return account_id
-        except Exception as e:
-            logger.error(f"Error adding monitored account: {str(e)}")
+            logger.info("Added monitored account: %s", instagram_username)
+            return result[0]
+        except Exception:
+            logger.exception("Error adding monitored account")
             self.conn.rollback()
             return -1
     
@@ -216,229 +348,314 @@ class DatabaseManager:
         """Update the last checked time for a monitored account"""
         try:
             cursor = self.conn.cursor()
-            cursor.execute(
-                "UPDATE monitored_accounts SET last_checked = ? WHERE id = ?",
-                (datetime.now().isoformat(), account_id)
-            )
+            cursor.execute(_SQL_UPDATE_ACCOUNT_CHECKED, (datetime.now().isoformat(), account_id))
+            
+            # Unknown account: nothing to commit
+            if cursor.rowcount == 0:
+                self.conn.rollback()
+                return False
+            
             self.conn.commit()
             return True
-        except Exception as e:
-            logger.error(f"Error updating account checked time: {str(e)}")
+        except Exception:
+            logger.exception("Error updating account checked time")
             self.conn.rollback()
             return False
     
     def add_processed_recipe(self, post_url: str, title: str, json_data: Dict, pdf_path: Optional[str] = None) -> int:
-        """Add a processed recipe to the database"""
+        """Add a processed recipe to the database, replacing any earlier version of the same post"""
         try:
             cursor = self.conn.cursor()
-            
-            # Check if recipe already exists
             cursor.execute(
-                "SELECT id FROM processed_recipes WHERE post_url = ?",
-                (post_url,)
+                _SQL_UPSERT_RECIPE_RETURNING,
+                (post_url, title, _dumps(json_data), datetime.now().isoformat(), pdf_path)
             )
             
-            result = cursor.fetchone()
-            
-            if result:
-                recipe_id = result[0]
-                
-                # Update existing recipe
-                cursor.execute(
-                    "UPDATE processed_recipes SET title = ?, json_data = ?, processed_at = ?, pdf_path = ? WHERE id = ?",
-                    (title, json.dumps(json_data), datetime.now().isoformat(), pdf_path, recipe_id)
-                )
-            else:
-                # Add new recipe
-                cursor.execute(
-                    "INSERT INTO processed_recipes (post_url, title, json_data, processed_at, pdf_path) VALUES (?, ?, ?, ?, ?)",
-                    (post_url, title, json.dumps(json_data), datetime.now().isoformat(), pdf_path)
-                )
-                recipe_id = cursor.lastrowid
+            recipe_id = cursor.fetchone()[0]
             
             self.conn.commit()
-            logger.info(f"Added/updated processed recipe: {title}")
+            self._invalidate(self._recipe_cache, (('id', recipe_id), ('url', post_url)))
+            logger.info("Added/updated processed recipe: %s", title)
             return recipe_id
-        except Exception as e:
-            logger.error(f"Error adding processed recipe: {str(e)}")
+        except Exception:
+            logger.exception("Error adding processed recipe")
             self.conn.rollback()
             return -1
     
+    def add_processed_recipes(self, recipes: List[Tuple[str, str, Dict, Optional[str]]]) -> bool:
+        """Add or replace several processed recipes in a single transaction
+        
+        Each item is a (post_url, title, json_data, pdf_path) tuple.
+        """
+        try:
+            processed_at = datetime.now().isoformat()
+            with self.conn:
+                self.conn.executemany(
+                    _SQL_UPSERT_RECIPE,
+                    [
+                        (post_url, title, _dumps(json_data), processed_at, pdf_path)
+                        for post_url, title, json_data, pdf_path in recipes
+                    ]
+                )
+            # Batch upserts don't report ids, so drop every cached recipe
+            with self._cache_lock:
+                self._recipe_cache.clear()
+            logger.info("Added/updated %d processed recipes", len(recipes))
+            return True
+        except Exception:
+            logger.exception("Error adding processed recipes")
+            return False
+    
     def record_delivery(self, user_id: int, recipe_id: int) -> bool:
         """Record that a recipe was delivered to a user"""
+        return self.record_deliveries([(user_id, recipe_id)])
+    
+    def record_deliveries(self, deliveries: List[Tuple[int, int]]) -> bool:
+        """Record several (user_id, recipe_id) deliveries in a single transaction
+        
+        Deliveries that were already recorded are skipped.
+        """
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "INSERT INTO delivered_recipes (user_id, recipe_id, delivered_at) VALUES (?, ?, ?)",
-                (user_id, recipe_id, datetime.now().isoformat())
-            )
-            self.conn.commit()
-            logger.info(f"Recorded recipe delivery - user_id: {user_id}, recipe_id: {recipe_id}")
-            return True
-        except sqlite3.IntegrityError:
-            # Already delivered, just return success
-            logger.info(f"Recipe already delivered - user_id: {user_id}, recipe_id: {recipe_id}")
+            delivered_at = datetime.now().isoformat()
+            with self.conn:
+                self.conn.executemany(
+                    _SQL_INSERT_DELIVERY,
+                    [(user_id, recipe_id, delivered_at) for user_id, recipe_id in deliveries]
+                )
+            logger.info("Recorded %d recipe deliveries", len(deliveries))
             return True
-        except Exception as e:
-            logger.error(f"Error recording recipe delivery: {str(e)}")
-            self.conn.rollback()
+        except Exception:
+            logger.exception("Error recording recipe deliveries")
             return False
     
-    def get_user_by_email(self, email: str) -> Optional[Dict]:
+    @contextmanager
+    def bulk_load(self):
+        """Drop secondary indexes for a large insert and rebuild them afterwards
+        
+        Building an index once over the loaded rows is cheaper than updating
+        it on every insert. Use it around initial syncs:
+        
+            with db.bulk_load():
+                db.add_processed_recipes(rows)
+        """
+        connection = self.conn
+        for name, _ in _INDEXES:
+            connection.execute(f"DROP INDEX IF EXISTS {name}")
+        connection.commit()
+        
+        try:
+            yield self
+        finally:
+            _create_indexes(connection)
+            connection.commit()
+            logger.info("Rebuilt indexes after bulk load")
+    
+    def get_user_by_email(self, email: str, use_cache: bool = True) -> Optional[Dict]:
         """Get user information by email"""
+        if use_cache:
+            user = self._cache_get(self._user_cache, ('email', email))
+            if user is not None:
+                return user
+        
         try:
             cursor = self.conn.cursor()
-            cursor.execute(
-                "SELECT id, email, created_at, preferences FROM users WHERE email = ?",
-                (email,)
-            )
+            cursor.execute(_SQL_GET_USER_BY_EMAIL, (email,))
             
             result = cursor.fetchone()
             
             if result:
-                user = dict(result)
+                user = dict(zip(_USER_COLUMNS, result))
                 if user.get('preferences'):
                     user['preferences'] = json.loads(user['preferences'])
+                self._cache_put(
+                    self._user_cache, (('id', user['id']), ('email', user['email'])), user, self.USER_CACHE_SIZE
+                )
                 return user
             else:
                 return None
-        except Exception as e:
-            logger.error(f"Error getting user by email: {str(e)}")
+        except Exception:
+            logger.exception("Error getting user by email")
             return None
     
-    def get_user_by_id(self, user_id: int) -> Optional[Dict]:
+    def get_user_by_id(self, user_id: int, use_cache: bool = True) -> Optional[Dict]:
         """Get user information by ID"""
+        if use_cache:
+            user = self._cache_get(self._user_cache, ('id', user_id))
+            if user is not None:
+                return user
+        
         try:
             cursor = self.conn.cursor()
-            cursor.execute(
-                "SELECT id, email, created_at, preferences FROM users WHERE id = ?",
-                (user_id,)
-            )
+            cursor.execute(_SQL_GET_USER_BY_ID, (user_id,))
             
             result = cursor.fetchone()
             
             if result:
-                user = dict(result)
+                user = dict(zip(_USER_COLUMNS, result))
                 if user.get('preferences'):
                     user['preferences'] = json.loads(user['preferences'])
+                self._cache_put(
+                    self._user_cache, (('id', user['id']), ('email', user['email'])), user, self.USER_CACHE_SIZE
+                )
                 return user
             else:
                 return None
-        except Exception as e:
-            logger.error(f"Error getting user by ID: {str(e)}")
+        except Exception:
+            logger.exception("Error getting user by ID")
             return None
     
-    def get_monitored_accounts(self) -> List[Dict]:
-        """Get all monitored Instagram accounts"""
+    def get_monitored_accounts(self, use_cache: bool = True) -> List[Dict]:
+        """Get all monitored Instagram accounts
+        
+        The cached list can trail update_account_checked_time by up to
+        ACCOUNTS_CACHE_TTL_SECONDS, which is fine at polling granularity.
+        """
+        cached = self._accounts_cache
+        if use_cache and cached is not None and cached[0] > time.monotonic():
+            return list(cached[1])
+        
         try:
             cursor = self.conn.cursor()
-            cursor.execute(
-                "SELECT id, instagram_username, added_at, last_checked FROM monitored_accounts"
-            )
+            cursor.execute(_SQL_GET_MONITORED_ACCOUNTS)
             
-            results = cursor.fetchall()
-            return [dict(row) for row in results]
-        except Exception as e:
-            logger.error(f"Error getting monitored accounts: {str(e)}")
+            accounts = [dict(zip(_ACCOUNT_COLUMNS, row)) for row in cursor]
+            self._accounts_cache = (time.monotonic() + self.ACCOUNTS_CACHE_TTL_SECONDS, accounts)
+            return list(accounts)
+        except Exception:
+            logger.exception("Error getting monitored accounts")
             return []
     
     def get_user_subscriptions(self, user_id: int) -> List[Dict]:
         """Get Instagram accounts a user is subscribed to"""
         try:
             cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                SELECT a.id, a.instagram_username, s.subscribed_at
-                FROM monitored_accounts a
-                JOIN user_account_subscriptions s ON a.id = s.account_id
-                WHERE s.user_id = ?
-                """,
-                (user_id,)
-            )
+            cursor.execute(_SQL_GET_USER_SUBSCRIPTIONS, (user_id,))
             
-            results = cursor.fetchall()
-            return [dict(row) for row in results]
-        except Exception as e:
-            logger.error(f"Error getting user subscriptions: {str(e)}")
+            return [dict(zip(_SUBSCRIPTION_COLUMNS, row)) for row in cursor]
+        except Exception:
+            logger.exception("Error getting user subscriptions")
             return []
     
-    def get_recipe_by_id(self, recipe_id: int) -> Optional[Dict]:
+    def get_recipe_by_id(self, recipe_id: int, use_cache: bool = True) -> Optional[Dict]:
         """Get recipe information by ID"""
+        if use_cache:
+            recipe = self._cache_get(self._recipe_cache, ('id', recipe_id))
+            if recipe is not None:
+                return recipe
+        
         try:
             cursor = self.conn.cursor()
-            cursor.execute(
-                "SELECT id, post_url, title, json_data, processed_at, pdf_path FROM processed_recipes WHERE id = ?",
-                (recipe_id,)
-            )
+            cursor.execute(_SQL_GET_RECIPE_BY_ID, (recipe_id,))
             
             result = cursor.fetchone()
             
             if result:
-                recipe = dict(result)
+                recipe = dict(zip(_RECIPE_COLUMNS, result))
                 if recipe.get('json_data'):
-                    recipe['json_data'] = json.loads(recipe['json_data'])
+                    recipe['json_data'] = _loads(recipe['json_data'])
+                self._cache_put(
+                    self._recipe_cache, (('id', recipe['id']), ('url', recipe['post_url'])), recipe, self.RECIPE_CACHE_SIZE
+                )
                 return recipe
             else:
                 return None
-        except Exception as e:
-            logger.error(f"Error getting recipe by ID: {str(e)}")
+        except Exception:
+            logger.exception("Error getting recipe by ID")
             return None
     
-    def get_recipe_by_url(self, post_url: str) -> Optional[Dict]:
+    def get_recipe_by_url(self, post_url: str, use_cache: bool = True) -> Optional[Dict]:
         """Get recipe information by Instagram post URL"""
+        if use_cache:
+            recipe = self._cache_get(self._recipe_cache, ('url', post_url))
+            if recipe is not None:
+                return recipe
+        
         try:
             cursor = self.conn.cursor()
-            cursor.execute(
-                "SELECT id, post_url, title, json_data, processed_at, pdf_path FROM processed_recipes WHERE post_url = ?",
-                (post_url,)
-            )
+            cursor.execute(_SQL_GET_RECIPE_BY_URL, (post_url,))
             
             result = cursor.fetchone()
             
             if result:
-                recipe = dict(result)
+                recipe = dict(zip(_RECIPE_COLUMNS, result))
                 if recipe.get('json_data'):
-                    recipe['json_data'] = json.loads(recipe['json_data'])
+                    recipe['json_data'] = _loads(recipe['json_data'])
+                self._cache_put(
+                    self._recipe_cache, (('id', recipe['id']), ('url', recipe['post_url'])), recipe, self.RECIPE_CACHE_SIZE
+                )
                 return recipe
             else:
                 return None
-        except Exception as e:
-            logger.error(f"Error getting recipe by URL: {str(e)}")
+        except Exception:
+            logger.exception("Error getting recipe by URL")
             return None
     
     def get_user_delivered_recipes(self, user_id: int) -> List[Dict]:
         """Get recipes delivered to a user"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                SELECT r.id, r.post_url, r.title, r.processed_at, r.pdf_path, d.delivered_at
-                FROM processed_recipes r
-                JOIN delivered_recipes d ON r.id = d.recipe_id
-                WHERE d.user_id = ?
-                ORDER BY d.delivered_at DESC
-                """,
-                (user_id,)
-            )
-            
-            results = cursor.fetchall()
-            return [dict(row) for row in results]
-        except Exception as e:
-            logger.error(f"Error getting user delivered recipes: {str(e)}")
+            return list(self.iter_user_delivered_recipes(user_id))
+        except Exception:
+            logger.exception("Error getting user delivered recipes")
             return []
     
+    def iter_user_delivered_recipes(self, user_id: int) -> Iterator[Dict]:
+        """Yield recipes delivered to a user, newest first, as SQLite steps through them
+        
+        Unlike get_user_delivered_recipes, errors propagate to the caller.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(_SQL_GET_USER_DELIVERED_RECIPES, (user_id,))
+        
+        for row in cursor:
+            yield dict(zip(_DELIVERED_RECIPE_COLUMNS, row))
+    
     def update_user_preferences(self, user_id: int, preferences: Dict) -> bool:
         """Update a user's preferences"""
         try:
             cursor = self.conn.cursor()
-            cursor.execute(
-                "UPDATE users SET preferences = ? WHERE id = ?",
-                (json.dumps(preferences), user_id)
-            )
+            cursor.execute(_SQL_UPDATE_USER_PREFERENCES, (json.dumps(preferences), user_id))
+            
+            # Unknown user: nothing to commit
+            if cursor.rowcount == 0:
+                self.conn.rollback()
+                return False
+            
             self.conn.commit()
-            logger.info(f"Updated preferences for user_id: {user_id}")
+            
+            # The email key for this user may be cached without its id key
+            with self._cache_lock:
+                self._user_cache.clear()
+            logger.info("Updated preferences for user_id: %s", user_id)
             return True
-        except Exception as e:
-            logger.error(f"Error updating user preferences: {str(e)}")
+        except Exception:
+            logger.exception("Error updating user preferences")
             self.conn.rollback()
             return False
+    
+    def _cache_get(self, cache: OrderedDict, key: Tuple) -> Optional[Dict]:
+        """Return a fresh cached row, dropping it if expired."""
+        with self._cache_lock:
+            entry = cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del cache[key]
+                return None
+            cache.move_to_end(key)
+            return entry[1]
+    
+    def _cache_put(self, cache: OrderedDict, keys: Tuple, row: Dict, max_size: int):
+        """Cache a row under each of its lookup keys, evicting the oldest entries."""
+        with self._cache_lock:
+            expires_at = time.monotonic() + self.CACHE_TTL_SECONDS
+            for key in keys:
+                cache[key] = (expires_at, row)
+                cache.move_to_end(key)
+            while len(cache) > max_size:
+                cache.popitem(last=False)
+    
+    def _invalidate(self, cache: OrderedDict, keys: Tuple):
+        """Drop cached rows for the given lookup keys after a write."""
+        with self._cache_lock:
+            for key in keys:
+                cache.pop(key, None)
@@ -76,6 +76,18 @@ Oops! Something went wrong while creating your recipe card. Our team has been no
 Could you try sending me a different recipe post? Or try this one again in a few minutes?
 """
 
+DELIVERY_ERROR = """
+Your recipe card is ready, but I couldn't email it to you just now. 📭
+
+Could you send me the post again in a few minutes?
+"""
+
+SERVICE_BUSY = """
+I'm working through a lot of recipe cards right now! 🍳
+
+Could you send me that post again in a few minutes?
+"""
+
 INVALID_EMAIL = """
 That doesn't look like a valid email address. Please send me a valid email so I can deliver your recipe card.
 """
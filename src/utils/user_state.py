@@ -4,14 +4,21 @@ Handles onboarding message flow for new users.
 
 import json
 import os
+import re
 from datetime import datetime
 import logging
 
 USER_MEMORY_FILE = "user_memory.json"
 STATE_NEW = "new"
+STATE_AWAITING_URL = "awaiting_url"
+STATE_AWAITING_EMAIL = "awaiting_email"
+STATE_PROCESSING = "processing"
 
 logger = logging.getLogger(__name__)
 
+_EMAIL_RE = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}')
+_INSTAGRAM_POST_RE = re.compile(r'https?://(?:www\.)?instagram\.com/(p|reel|tv)/([A-Za-z0-9_-]+)')
+
 WELCOME_MESSAGES = [
     "👋 Hey! I’m your recipe assistant. If you send me a shared recipe post, I’ll extract the full recipe and send you back a clean PDF copy.",
     "📌 Just paste or forward any Instagram recipe post. I’ll do the rest — no sign-up needed.",
@@ -45,6 +52,47 @@ class UserStateManager:
         }
         self.save_state()
 
+    def add_processed_post(self, user_id, post_url, recipe_title, updates=None, pdf_path=None):
+        """Record a processed post, applying any state updates in the same write."""
+        state = self.get_user_state(user_id)
+        processed_posts = state.get("processed_posts", []) + [{
+            "url": post_url,
+            "title": recipe_title,
+            "pdf_path": pdf_path,
+            "processed_at": datetime.utcnow().isoformat()
+        }]
+        self.update_user_state(user_id, {
+            **(updates or {}),
+            "processed_posts": processed_posts
+        })
+
+    def get_processed_post(self, user_id, post_url):
+        """Return the most recent record of a post already processed for a user, if any."""
+        for post in reversed(self.get_user_state(user_id).get("processed_posts", [])):
+            if post.get("url") == post_url:
+                return post
+        return None
+
+    def is_valid_email(self, email):
+        """Check whether a string is exactly one email address."""
+        # Cheap containment check rejects most chat messages before the regex
+        if '@' not in email:
+            return False
+        return _EMAIL_RE.fullmatch(email) is not None
+
+    def parse_instagram_url(self, message):
+        """Return the canonical URL if a message starts with an Instagram post or reel URL."""
+        if 'instagram.com/' not in message:
+            return None
+        match = _INSTAGRAM_POST_RE.match(message.strip())
+        if not match:
+            return None
+        return f"https://www.instagram.com/{match.group(1)}/{match.group(2)}/"
+
+    def is_instagram_post_url(self, message):
+        """Check whether a message starts with an Instagram post or reel URL."""
+        return self.parse_instagram_url(message) is not None
+
 class OnboardingManager:
     def __init__(self, user_state_manager: UserStateManager):
         self.user_state_manager = user_state_manager
@@ -54,7 +102,7 @@ class OnboardingManager:
         return state.get("state") == STATE_NEW
 
     def mark_onboarded(self, user_id: str):
-        self.user_state_manager.update_user_state(user_id, {"state": "awaiting_url"})
+        self.user_state_manager.update_user_state(user_id, {"state": STATE_AWAITING_URL})
 
     def get_onboarding_messages(self) -> list[str]:
         return WELCOME_MESSAGES
\ No newline at end of file
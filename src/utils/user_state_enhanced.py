@@ -5,13 +5,6 @@ import logging
 import re
 from typing import Dict, Optional, List, Any
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-
 logger = logging.getLogger(__name__)
 
 class UserStateManager:
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Regression check for ClaudeVisionAssistant's async API across event loops
+
+Each asyncio.run() starts a fresh loop. The shared AsyncAnthropic client must
+keep working on the second one instead of failing with "Connection error".
+Runs offline against a local stand-in for the Messages API.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+MESSAGES = [{"sender": "chef_marco", "text": "here's the recipe"}]
+
+
+class FakeMessagesAPI(BaseHTTPRequestHandler):
+    """Answers every request with a forced screenshot-analysis tool call."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({
+            "id": "msg_test",
+            "type": "message",
+            "role": "assistant",
+            "model": "test",
+            "content": [{
+                "type": "tool_use",
+                "id": "toolu_test",
+                "name": "emit_screenshot_analysis",
+                "input": {"messages": MESSAGES},
+            }],
+            "stop_reason": "tool_use",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 1, "output_tokens": 1},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeMessagesAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+
+    from src.utils.claude_vision_assistant import ClaudeVisionAssistant
+    vision = ClaudeVisionAssistant("test-key")
+
+    print("🧪 Testing aanalyze_screenshot across asyncio.run() calls")
+    print("=" * 50)
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        # A different image per run, so the response cache can't answer the second call
+        for run, color in enumerate(("red", "blue"), start=1):
+            path = os.path.join(tmp, f"screenshot_{color}.png")
+            Image.new("RGB", (64, 64), color).save(path)
+            result = asyncio.run(vision.aanalyze_screenshot(path, ("messages",)))
+            ok = result["messages"] == MESSAGES
+            failures += not ok
+            print(f"Run {run}: {'✅' if ok else '❌'} {result['messages']}")
+
+    server.shutdown()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())